@@ -6,11 +6,16 @@
 # ----------
 
 from .ioc import IServiceProvider, ServiceProvider, ServiceNotFoundError
+from .ioc_async import AsyncServiceProvider
+from .err import CircularDependencyError, ServiceValidationError
 from .ioc_service_info import LifeTime
 
 __all__ = [
     'IServiceProvider',
     'ServiceProvider',
+    'AsyncServiceProvider',
     'ServiceNotFoundError',
+    'ServiceValidationError',
+    'CircularDependencyError',
     'LifeTime',
 ]
@@ -5,52 +5,204 @@
 #
 # ----------
 
-from typing import Dict, List, Tuple, Any
+from itertools import count
+from threading import Lock
+from typing import Dict, List, Optional, Tuple, Any
 
 from .symbols import _Symbol
 
+_versions_counter = count(1)
+_MISSING = _Symbol('missing')
+
+
+class _SharedState:
+    'the state shared by all `ServicesMap` from the same root.'
+
+    __slots__ = ('versions', 'generation', 'layout', 'lock')
+
+    def __init__(self):
+        # the versions of each key.
+        # a version changed when the key was added or disposed in any scope.
+        self.versions: Dict[Any, int] = {}
+        # the latest version of any key from the root map,
+        # changed when anything was added or disposed in the root, but not the scopes.
+        self.generation = 0
+        # changed when a scope which has child scopes create it's own layer.
+        self.layout = 0
+        self.lock = Lock()
+
+
 class ServicesMap:
-    def __init__(self, *maps):
-        self.maps: List[Dict[Any, List[Tuple[_Symbol, Any]]]] = list(maps) or [{}]
+    '''
+    a layered map for services.
+
+    a scope only creates it's own layer after something was added into it,
+    otherwise it shares the index with the nearest parent which has a layer.
+    each index stores the winning value per key, so a lookup is a single dict hit
+    no matter how deep the scope is.
+    '''
+
+    __slots__ = ('_state', '_parent', '_layer', '_index', '_plans', '_owner', '_has_children', 'versions')
+
+    def __init__(self, *, parent: Optional['ServicesMap']=None):
+        self._parent = parent
+        self._has_children = False
+        # (layout, the map which owns the index)
+        self._owner: Tuple[int, Optional[ServicesMap]] = (-1, None)
+        if parent is None:
+            self._state = _SharedState()
+            # key -> (version, value)
+            self._index: Optional[Dict[Any, Tuple[Optional[int], Any]]] = {}
+            self._layer: Optional[Dict[Any, List[Tuple[_Symbol, Any]]]] = {}
+            self._plans: Optional[Dict[Any, Tuple[Optional[int], Any]]] = {}
+        else:
+            self._state = parent._state
+            self._index = None
+            self._layer = None
+            self._plans = None
+        self.versions = self._state.versions
+
+    def _get_owner(self) -> 'ServicesMap':
+        layout, owner = self._owner
+        state = self._state
+        if layout != state.layout:
+            layout = state.layout # read before walk
+            owner = self
+            while owner._layer is None:
+                owner = owner._parent
+            self._owner = (layout, owner)
+        return owner
+
+    def get_plans(self) -> Dict[Any, Tuple[Optional[int], Any]]:
+        '''
+        get the dict to cache anything by the versions of the keys, like the resolution plans.
+
+        the dict is shared with the nearest parent which has a layer, like the index,
+        so the values must not depend on the scope.
+        '''
+        plans = self._plans
+        if plans is None:
+            plans = self._get_owner()._plans
+        return plans
+
+    def _resolve(self, key):
+        'resolve the winning value from layers, or `_MISSING` if not found'
+        mapping = self
+        while mapping is not None:
+            layer = mapping._layer
+            if layer is not None:
+                values = layer.get(key)
+                if values:
+                    return values[-1][1]
+            mapping = mapping._parent
+        return _MISSING
 
     def resolve(self, key):
         '''
         resolve values with reversed order.
         '''
-        for mapping in self.maps:
-            yield from (v for _s, v in reversed(mapping.get(key, [])))
+        mapping = self
+        while mapping is not None:
+            layer = mapping._layer
+            if layer is not None:
+                yield from (v for _s, v in reversed(layer.get(key, ())))
+            mapping = mapping._parent
+
+    def _lookup(self, key):
+        owner = self._get_owner()
+        index = owner._index
+        version = self.versions.get(key)
+        entry = index.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = owner._resolve(key)
+        if value is not _MISSING:
+            index[key] = (version, value)
+        return value
 
     def __setitem__(self, key, value):
         self.add(key, value)
 
     def __getitem__(self, key):
         'get item or raise `KeyError`` if not found'
-        for value in self.resolve(key):
-            return value
-        raise KeyError(key)
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
 
     def get(self, key, default=None):
         'get item or `default` if not found'
-        for value in self.resolve(key):
-            return value
-        return default
+        value = self._lookup(key)
+        if value is _MISSING:
+            return default
+        return value
 
     def get_many(self, key):
         'get items as list'
         return list(self.resolve(key))
 
+    def keys(self):
+        'get the keys which has any value as list'
+        keys = {}
+        mapping = self
+        while mapping is not None:
+            layer = mapping._layer
+            if layer is not None:
+                keys.update((k, None) for k, v in list(layer.items()) if v)
+            mapping = mapping._parent
+        return list(keys)
+
     def scope(self):
-        return self.__class__({}, *self.maps)
+        self._has_children = True
+        return self.__class__(parent=self)
+
+    def _get_layer(self):
+        layer = self._layer
+        if layer is None:
+            state = self._state
+            with state.lock:
+                layer = self._layer
+                if layer is None:
+                    # the index must be ready before the layer
+                    self._index = {}
+                    self._plans = {}
+                    layer = self._layer = {}
+                    if self._has_children:
+                        # child scopes must stop sharing the index of the parent
+                        state.layout += 1
+                    self._owner = (state.layout, self)
+        return layer
+
+    @property
+    def generation(self) -> int:
+        'changed when anything was added or disposed in the root map, or `invalidate()` was called'
+        return self._state.generation
+
+    def _touch(self, key):
+        # must be called after the layer was changed
+        version = self.versions[key] = next(_versions_counter)
+        if self._parent is None:
+            self._state.generation = version
+
+    def invalidate(self):
+        'change the versions of all keys, so anything cached by the versions will be revalidated'
+        with self._state.lock:
+            for key in list(self.versions):
+                self._touch(key)
+            self._state.generation = next(_versions_counter)
 
     def add(self, key, value):
         internal_value = (_Symbol(), value) # ensure dispose the right value
-        self.maps[0].setdefault(key, []).append(internal_value)
+        layer = self._get_layer()
+        layer.setdefault(key, []).append(internal_value)
+        self._touch(key)
 
         def dispose():
             try:
-                self.maps[0][key].remove(internal_value)
+                layer[key].remove(internal_value)
             except ValueError:
                 raise RuntimeError('Cannot call dispose again')
+            self._touch(key)
 
         return Disposable(dispose)
 
@@ -9,12 +9,95 @@
 import sys
 import atexit
 import inspect
+import keyword
+from types import CodeType, FrameType
+from typing import Callable, Dict, Optional, Tuple
+
+# the filename of the code which generated by anyioc
+_GENERATED_FILENAME = '<anyioc-generated>'
+
+# code object -> (module name or `None`, whether the module is from anyioc)
+_code_modules: Dict[CodeType, Tuple[Optional[str], bool]] = {}
+# the code objects can be created dynamically, so limit the cache size
+_CODE_MODULES_MAX_SIZE = 4096
+
+def _get_code_module(frame: FrameType) -> Tuple[Optional[str], bool]:
+    code = frame.f_code
+    try:
+        return _code_modules[code]
+    except KeyError:
+        pass
+    if code.co_filename == _GENERATED_FILENAME:
+        name = __name__
+    else:
+        # the module only depends on the filename of the code
+        mo = inspect.getmodule(frame)
+        name = None if mo is None else mo.__name__
+    entry = (name, name is not None and name.partition('.')[0] == 'anyioc')
+    if len(_code_modules) >= _CODE_MODULES_MAX_SIZE:
+        _code_modules.clear()
+    _code_modules[code] = entry
+    return entry
+
+
+class FrameRecord:
+    '''
+    a lightweight replacement of `inspect.FrameInfo`,
+    the source context is only read when it is accessed.
+    '''
+
+    __slots__ = ('frame', 'module_name')
+
+    def __init__(self, frame: FrameType, module_name: Optional[str]):
+        self.frame = frame
+        # `None` if unable to find the module
+        self.module_name = module_name
+
+    def __repr__(self) -> str:
+        return f'<FrameRecord: {self.filename}:{self.lineno} {self.function}>'
+
+    @property
+    def filename(self) -> str:
+        return self.frame.f_code.co_filename
+
+    @property
+    def lineno(self) -> int:
+        return self.frame.f_lineno
+
+    @property
+    def function(self) -> str:
+        return self.frame.f_code.co_name
+
+    @property
+    def code_context(self):
+        return inspect.getframeinfo(self.frame).code_context
+
+    @property
+    def index(self):
+        return inspect.getframeinfo(self.frame).index
+
 
-def get_module_name(fr: inspect.FrameInfo):
+def get_caller_frame(depth: int=0) -> Optional[FrameRecord]:
+    '''
+    get the first frame which is not from anyioc,
+    starts from the frame which is `depth` levels above the caller.
+    '''
+    frame = sys._getframe(depth + 1)
+    while frame is not None:
+        name, is_anyioc = _get_code_module(frame)
+        if not is_anyioc:
+            return FrameRecord(frame, name)
+        frame = frame.f_back
+    return None
+
+def get_frame_module_name(frame: FrameType) -> str:
+    'get module name from frame'
+    name = _get_code_module(frame)[0]
+    return '<stdin>' if name is None else name
+
+def get_module_name(fr):
     'get module name from frame info'
-    mo = inspect.getmodule(fr.frame)
-    name = '<stdin>' if mo is None else mo.__name__
-    return name
+    return get_frame_module_name(fr.frame)
 
 def dispose_at_exit(provider):
     '''
@@ -34,6 +117,54 @@ def update_wrapper(wrapper, wrapped):
     wrapper.__anyioc_wrapped__ = getattr(wrapped, '__anyioc_wrapped__', wrapped)
     return wrapper
 
+def get_injects_dependencies(injects):
+    '''
+    get the dependencies as `(key, required)` pairs
+    from the injection metadata (`__anyioc_injects__`).
+    '''
+    if injects is None:
+        return ()
+    _, pos_args, kw_args = injects
+    return [(item[0], len(item) == 1) for item in (*pos_args, *kw_args.values())]
+
+def make_injector(func, pos_args, kw_args) -> Callable:
+    '''
+    generate a function with signature `(ioc) => any` which resolve the arguments
+    from the `(key, )` or `(key, default)` items and call the `func`.
+
+    the arguments are resolved by straight-line code, without any loop at runtime.
+    '''
+    namespace = {'func': func}
+    def resolve(item):
+        index = len(namespace)
+        namespace[f'k{index}'] = item[0]
+        if len(item) == 1:
+            return f'ioc[k{index}]'
+        namespace[f'd{index}'] = item[1]
+        return f'ioc.get(k{index}, d{index})'
+
+    args = [resolve(item) for item in pos_args]
+    extra_kwargs = []
+    for name, item in kw_args.items():
+        if name.isidentifier() and not keyword.iskeyword(name):
+            args.append(f'{name}={resolve(item)}')
+        else:
+            extra_kwargs.append(f'{name!r}: {resolve(item)}')
+    if extra_kwargs:
+        args.append('**{' + ', '.join(extra_kwargs) + '}')
+
+    source = f'def new_func(ioc):\n    return func({", ".join(args)})\n'
+    exec(compile(source, _GENERATED_FILENAME, 'exec'), namespace)
+    return namespace['new_func']
+
+def is_injector(func) -> bool:
+    '''
+    check whether the `func` is the injector which made by `make_injector()`,
+    not a wrapper which copied the attributes from it.
+    '''
+    code = getattr(func, '__code__', None)
+    return code is not None and code.co_filename == _GENERATED_FILENAME
+
 def wrap_signature(func):
     '''
     wrap the function to single argument function.
@@ -11,9 +11,39 @@ class ServiceNotFoundError(LookupError):
     '''
 
     def __init__(self, *resolve_chain):
+        super().__init__(*resolve_chain)
         self.resolve_chain = resolve_chain
+
+    def __str__(self):
+        # format on demand, the errors may be caught without being shown
+        resolve_chain = self.resolve_chain
         msg = f'unknown service: {repr(resolve_chain[-1])}'
         if len(resolve_chain) > 1:
             resolve_chain_msg = '->'.join([repr(i) for i in resolve_chain])
             msg += f'; resolve chain: {resolve_chain_msg}'
+        return msg
+
+
+class CircularDependencyError(RuntimeError):
+    '''
+    raise when a service depends on itself while it is creating.
+    '''
+
+    def __init__(self, *cycle):
+        super().__init__()
+        # the keys of the cycle, the first one is the same as the last one
+        self.cycle = cycle
+
+    def __str__(self):
+        return 'circular dependency: ' + '->'.join([repr(i) for i in self.cycle])
+
+
+class ServiceValidationError(Exception):
+    '''
+    raise when the services of a `ServiceProvider` are invalid.
+    '''
+
+    def __init__(self, issues: list):
+        self.issues = issues
+        msg = '\n'.join(['invalid services:'] + [f'  {i.message}' for i in issues])
         super().__init__(msg)
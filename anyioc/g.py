@@ -7,11 +7,12 @@
 
 import importlib
 import importlib.util
-import inspect
+import sys
 import threading
-from typing import Optional
+from types import CodeType
+from typing import Callable, Dict, Optional
 
-from ._utils import dispose_at_exit, get_module_name
+from ._utils import dispose_at_exit, get_frame_module_name
 from .ioc import ServiceProvider
 
 ioc = ServiceProvider()
@@ -52,9 +53,24 @@ def _get_module_provider(module_name: str):
 
     return provider
 
-def _get_caller_module_name():
-    fr = inspect.getouterframes(inspect.currentframe())[2]
-    return get_module_name(fr)
+# the code object of caller -> provider, the module of a code object never changed
+_caller_module_providers: Dict[CodeType, ServiceProvider] = {}
+_caller_pkgroot_providers: Dict[CodeType, ServiceProvider] = {}
+# the code objects can be created dynamically, so limit the cache size
+_CALLER_PROVIDERS_MAX_SIZE = 4096
+
+def _get_caller_provider(cache: Dict[CodeType, ServiceProvider],
+                         get_provider: Callable[[str], ServiceProvider]) -> ServiceProvider:
+    'get the provider for the caller of the caller'
+    frame = sys._getframe(2)
+    code = frame.f_code
+    provider = cache.get(code)
+    if provider is None:
+        provider = get_provider(get_frame_module_name(frame))
+        if len(cache) >= _CALLER_PROVIDERS_MAX_SIZE:
+            cache.clear()
+        cache[code] = provider
+    return provider
 
 def get_module_provider(module_name: Optional[str]=None) -> ServiceProvider:
     '''
@@ -69,7 +85,7 @@ def get_module_provider(module_name: Optional[str]=None) -> ServiceProvider:
     ```
     '''
     if module_name is None:
-        module_name = _get_caller_module_name()
+        return _get_caller_provider(_caller_module_providers, get_module_provider)
 
     if not isinstance(module_name, str):
         raise TypeError
@@ -85,7 +101,7 @@ def get_pkgroot_provider(pkgroot: Optional[str]=None) -> ServiceProvider:
     for example, `get_pkgroot_provider('A.B.C.D')` is equals `get_module_provider('A')`
     '''
     if pkgroot is None:
-        pkgroot = _get_caller_module_name()
+        return _get_caller_provider(_caller_pkgroot_providers, get_pkgroot_provider)
 
     if not isinstance(pkgroot, str):
         raise TypeError
@@ -7,15 +7,17 @@
 
 from abc import abstractmethod
 from contextlib import ExitStack, nullcontext
+from contextvars import ContextVar
 from logging import getLogger
 from threading import RLock
 from types import MappingProxyType
-from typing import Any, Callable, ContextManager, Iterable, List, Optional, TypeVar
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple, TypeVar
 
 from ._servicesmap import ServicesMap
 from ._utils import wrap_signature as _wrap_signature
-from .err import ServiceNotFoundError
+from .err import ServiceNotFoundError, ServiceValidationError
 from .ioc_resolver import IServiceInfoResolver, ServiceInfoChainResolver
+from .ioc_resolver import _try_get_by_get
 from .ioc_service_info import (
     BindedServiceInfo,
     CallerFrameServiceInfo,
@@ -24,15 +26,43 @@ from .ioc_service_info import (
     IServiceInfo,
     LifeTime,
     ProviderServiceInfo,
+    ScopedSlots,
     ServiceInfo,
     ValueServiceInfo,
 )
 from .symbols import Symbols
 
 _T = TypeVar("_T")
+_TProvider = TypeVar("_TProvider", bound='ServiceProvider')
 
 _logger = getLogger(__name__)
 
+# the entered providers for current context, as a linked list: (provider, next node)
+_entered_providers: 'ContextVar[Optional[Tuple[ServiceProvider, Any]]]' = ContextVar(
+    'anyioc_entered_providers', default=None)
+
+def _remove_entered_provider(provider: 'ServiceProvider'):
+    '''
+    remove the provider from the entered providers of current context.
+    '''
+    head = _entered_providers.get()
+    if head is None:
+        return
+    if head[0] is provider:
+        # fast path for exit by order
+        _entered_providers.set(head[1])
+        return
+    skipped = []
+    node = head
+    while node is not None and node[0] is not provider:
+        skipped.append(node[0])
+        node = node[1]
+    if node is not None:
+        node = node[1]
+        for item in reversed(skipped):
+            node = (item, node)
+        _entered_providers.set(node)
+
 
 class IServiceProvider:
     '''
@@ -69,12 +99,18 @@ class ServiceProvider(IServiceProvider):
     def __init__(self, auto_enter=False, *,
                 # internal uses:
                 _services: Optional[ServicesMap]=None,
-                _parent: Optional['ServiceProvider']=None
+                _parent: Optional['ServiceProvider']=None,
+                _options: Optional[dict]=None
             ):
 
         self._exit_stack = None
-        self._scoped_cache = {}
+        # the alive child scopes, use as a ordered set
+        self._scopes: Dict['ServiceProvider', None] = {}
+        # the scoped instances, indexed by the slot of the `ServiceInfo`
+        self._scoped_instances: List[Any] = []
         self._parent = _parent
+        # the slots allocator of the root provider
+        self._scoped_slots: ScopedSlots = ScopedSlots() if _parent is None else _parent._scoped_slots
 
         assert (_parent is None) is (_services is None)
 
@@ -82,6 +118,7 @@ class ServiceProvider(IServiceProvider):
             assert _services is not None
             # scope provider
             assert auto_enter is False, 'must be default value'
+            assert _options is None, 'must be default value'
             self._services = _services
             self._root: ServiceProvider = _parent._root
             self._lock = nullcontext()
@@ -91,6 +128,7 @@ class ServiceProvider(IServiceProvider):
             self._services = ServicesMap()
             self._root: ServiceProvider = self
             self._lock = RLock()
+            self._profiler = None
 
             provider_service_info = ProviderServiceInfo()
             self._services[Symbols.provider] = provider_service_info
@@ -113,6 +151,7 @@ class ServiceProvider(IServiceProvider):
             # options
             self._services[Symbols.provider_options] = ValueServiceInfo(MappingProxyType(
                 dict(
+                    _options or (),
                     auto_enter=auto_enter
                 )
             ))
@@ -144,38 +183,154 @@ class ServiceProvider(IServiceProvider):
                             func(self)
                     except Exception as e:
                         self.__init_exc = e
+                        # plans must not bypass the init error
+                        self._services.get_plans().clear()
                         raise
                     disposable()
                     self._services.add(Symbols.at_init, ValueServiceInfo(False))
 
+    def _try_get_service_info(self, key) -> Optional[IServiceInfo]:
+        '''
+        get the `IServiceInfo` by key, or `None` if it was not found.
+        '''
+        service_info = self._services.get(key)
+        if service_info is not None:
+            return service_info
+        # load missing resolver and resolve service info.
+        resolver: IServiceInfoResolver = self._services[Symbols.missing_resolver].get(self)
+        if isinstance(resolver, IServiceInfoResolver):
+            return resolver.try_get(self, key)
+        return _try_get_by_get(resolver, self, key) # duck typing resolver
+
     def _get_service_info(self, key) -> IServiceInfo:
+        service_info = self._try_get_service_info(key)
+        if service_info is None:
+            raise ServiceNotFoundError(key)
+        return service_info
+
+    @property
+    def _scoped_cache(self) -> dict:
+        '''
+        the cache dict for `Symbols.cache`, created on first use.
+
+        the scoped services do not use it, they are stored in `_scoped_instances`.
+        '''
         try:
-            return self._services[key]
+            return self.__dict__['_scoped_cache_dict']
         except KeyError:
-            pass
-        # load missing resolver and resolve service info.
-        resolver: IServiceInfoResolver = self._services[Symbols.missing_resolver].get(self)
-        return resolver.get(self, key)
+            return self.__dict__.setdefault('_scoped_cache_dict', {})
 
-    def __getitem__(self, key):
-        _logger.debug('get service by key: %r', key)
+    @property
+    def _foreign_scoped_instances(self) -> dict:
+        '''
+        the scoped instances of the `ServiceInfo` which created from other root provider,
+        created on first use.
+        '''
+        try:
+            return self.__dict__['_foreign_scoped_instances_dict']
+        except KeyError:
+            return self.__dict__.setdefault('_foreign_scoped_instances_dict', {})
+
+    def _get_scoped_lock(self):
+        '''
+        get the lock which use to create scoped services in this scope.
+
+        the lock is created on first use, so scopes which never create
+        scoped services do not allocate it.
+        '''
+        try:
+            return self._scoped_lock
+        except AttributeError:
+            # atomic, all threads will get the same lock
+            return self.__dict__.setdefault('_scoped_lock', RLock())
+
+    def _resolve_service_info(self, key) -> IServiceInfo:
+        '''
+        get the `IServiceInfo` by key after the init hooks called.
+        '''
+        self._root.__ensure_init_hooks_called()
+        return self._get_service_info(key)
+
+    def _try_resolve_service_info(self, key) -> Optional[IServiceInfo]:
+        '''
+        get the `IServiceInfo` by key after the init hooks called, or `None` if it was not found.
+        '''
+        self._root.__ensure_init_hooks_called()
+        return self._try_get_service_info(key)
+
+    def _resolve_service_infos(self, key) -> List[IServiceInfo]:
+        '''
+        get all `IServiceInfo` by key after the init hooks called.
+        '''
+        self._root.__ensure_init_hooks_called()
+        return self._services.get_many(key)
+
+    def _try_compile_plan(self, key):
+        '''
+        compile the resolution plan for the key, or returns `None` if the service was not found.
+
+        the plans of registered services are cached until the key was changed,
+        the plans of the `cacheable` services from the missing resolver are cached
+        until the key was registered or the root was changed, others are dynamic.
+        '''
+        _logger.debug('compile plan for key: %r', key)
         self._root.__ensure_init_hooks_called()
-        service_info = self._get_service_info(key)
+        services = self._services
+        # version and generation must be read before resolve the service info
+        version = services.versions.get(key)
+        generation = services.generation
+        service_info = services.get(key)
+        if service_info is None:
+            service_info = self._try_get_service_info(key)
+            if service_info is None:
+                return None
+            entry = (None, self.__get_plan(key, service_info), generation)
+            if version is None and getattr(service_info, 'cacheable', False):
+                services.get_plans()[key] = entry
+            return entry
+        entry = (version, self.__get_plan(key, service_info))
+        # the plans do not capture the provider, so the scopes without own services can share them
+        services.get_plans()[key] = entry
+        return entry
+
+    def __get_plan(self, key, service_info: IServiceInfo):
+        plan = service_info.get_plan()
+        profiler = self._root._profiler
+        if profiler is not None:
+            plan = profiler.wrap_plan(key, service_info, plan)
+        return plan
+
+    def __getitem__(self, key):
+        services = self._services
+        entry = services.get_plans().get(key)
+        if entry is None or entry[0] != services.versions.get(key) or \
+                entry[0] is None and entry[2] != services.generation:
+            entry = self._try_compile_plan(key)
+            if entry is None:
+                raise ServiceNotFoundError(key)
         try:
-            return service_info.get(self)
+            return entry[1](self)
         except ServiceNotFoundError as err:
             raise ServiceNotFoundError(key, *err.resolve_chain)
 
     def get(self, key, d=None) -> Any:
         '''
         get a service by key.
+
+        returns `d` if the service was not found,
+        but still raise `ServiceNotFoundError` if any dependency of the service was not found.
         '''
+        services = self._services
+        entry = services.get_plans().get(key)
+        if entry is None or entry[0] != services.versions.get(key) or \
+                entry[0] is None and entry[2] != services.generation:
+            entry = self._try_compile_plan(key)
+            if entry is None:
+                return d
         try:
-            return self[key]
+            return entry[1](self)
         except ServiceNotFoundError as err:
-            if len(err.resolve_chain) == 1:
-                return d
-            raise
+            raise ServiceNotFoundError(key, *err.resolve_chain)
 
     def get_many(self, key) -> List[Any]:
         '''
@@ -193,8 +348,7 @@ class ServiceProvider(IServiceProvider):
         ```
         '''
         _logger.debug('get services by key: %r', key)
-        self._root.__ensure_init_hooks_called()
-        service_infos: Iterable[IServiceInfo] = self._services.get_many(key)
+        service_infos = self._resolve_service_infos(key)
         try:
             return [si.get(self) for si in service_infos]
         except ServiceNotFoundError as err:
@@ -211,14 +365,48 @@ class ServiceProvider(IServiceProvider):
                 self._exit_stack = ExitStack()
             return self._exit_stack.enter_context(context)
 
+    def current(self) -> 'ServiceProvider':
+        '''
+        get the innermost entered scope of this provider (or itself)
+        from the current context (the running thread or asyncio task).
+
+        returns this provider itself if no scope was entered.
+        '''
+        node = _entered_providers.get()
+        while node is not None:
+            provider, node = node
+            ancestor = provider
+            while ancestor is not None:
+                if ancestor is self:
+                    return provider
+                ancestor = ancestor._parent
+        return self
+
     def __enter__(self):
+        # set as the current provider for the current context
+        _entered_providers.set((self, _entered_providers.get()))
         return self
 
     def __exit__(self, *args):
+        _remove_entered_provider(self)
+
         with self._lock:
-            if self._exit_stack is not None:
-                self._exit_stack.__exit__(*args)
+            exit_stack = self._exit_stack
+            if self._scopes:
+                if exit_stack is None:
+                    exit_stack = ExitStack()
+                # the alive child scopes should exit before the parent
+                for scope in list(self._scopes):
+                    exit_stack.push(scope)
+            if exit_stack is not None:
                 self._exit_stack = None
+                exit_stack.__exit__(*args)
+
+        parent = self._parent
+        if parent is not None:
+            # detach from the parent, so the parent will not retain the exited scope.
+            # dict operations are atomic, so this does not need the lock of the parent.
+            parent._scopes.pop(self, None)
 
     def register_service_info(self, key, service_info: IServiceInfo):
         '''
@@ -290,7 +478,7 @@ class ServiceProvider(IServiceProvider):
 
         equals `register_transient(key, lambda ioc: tuple(ioc[k] for k in keys))`
         '''
-        return self.register_service_info(key, GroupedServiceInfo(keys))
+        return self.register_service_info(key, GroupedServiceInfo(keys, key))
 
     def register_bind(self, new_key, target_key):
         '''
@@ -299,14 +487,82 @@ class ServiceProvider(IServiceProvider):
 
         equals `register_transient(new_key, lambda ioc: ioc[target_key])`
         '''
-        return self.register_service_info(new_key, BindedServiceInfo(target_key))
+        return self.register_service_info(new_key, BindedServiceInfo(target_key, new_key))
 
     def scope(self):
         '''
         create a scoped service provider.
         '''
-        ssp = ServiceProvider(_services=self._services.scope(), _parent=self)
-        return self.enter(ssp)
+        return self._add_scope(ServiceProvider(_services=self._services.scope(), _parent=self))
+
+    def _add_scope(self, ssp: _TProvider) -> _TProvider:
+        # lock free, so the scopes can be created concurrently from multiple threads
+        self._scopes[ssp] = None
+        return ssp
+
+    def enable_profiling(self):
+        '''
+        start to record the resolutions of the root provider and all scopes,
+        returns the `ResolutionProfiler` which use to get the statistics.
+
+        returns the current one if the profiling is already enabled.
+        '''
+        from .ioc_profiler import ResolutionProfiler
+        root = self._root
+        with root._lock:
+            if root._profiler is None:
+                root._profiler = ResolutionProfiler()
+                # recompile all plans with the profiler
+                self._services.invalidate()
+            return root._profiler
+
+    def disable_profiling(self):
+        '''
+        stop to record the resolutions,
+        returns the `ResolutionProfiler` which was used, or `None` if the profiling was not enabled.
+        '''
+        root = self._root
+        with root._lock:
+            profiler = root._profiler
+            if profiler is not None:
+                root._profiler = None
+                # recompile all plans without the profiler
+                self._services.invalidate()
+            return profiler
+
+    def get_dependency_graph(self):
+        '''
+        get the `DependencyGraph` of the services without create them.
+        '''
+        from .ioc_graph import build_dependency_graph
+        return build_dependency_graph(self)
+
+    def validate(self):
+        '''
+        validate the services without create them.
+
+        raise `ServiceValidationError` if any issues found,
+        includes missing services, circular dependencies and singletons capture scoped services.
+
+        returns the `DependencyGraph` if no issues found.
+        '''
+        graph = self.get_dependency_graph()
+        issues = graph.get_issues()
+        if issues:
+            raise ServiceValidationError(issues)
+        return graph
+
+    def warm_up(self, max_workers: Optional[int]=None) -> Dict[Any, float]:
+        '''
+        create all singletons which are not created yet, instead of lazily on first request.
+
+        the independent singletons are created in parallel on a thread pool with `max_workers`,
+        after the singletons which they depend on.
+
+        returns the seconds of each singleton creation.
+        '''
+        from .ioc_graph import warm_up
+        return warm_up(self, max_workers)
 
     @property
     def builder(self):
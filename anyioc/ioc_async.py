@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+#
+# ----------
+
+from concurrent.futures import Executor
+from contextlib import AsyncExitStack
+from logging import getLogger
+from typing import Any, AsyncContextManager, List, Optional, TypeVar
+
+from .err import ServiceNotFoundError
+from .ioc import ServiceProvider
+from .ioc_service_info import ProviderServiceInfo
+
+_T = TypeVar("_T")
+
+_logger = getLogger(__name__)
+
+_NOT_SET = object()
+
+
+class AsyncServiceProvider(ServiceProvider):
+    '''
+    a `ServiceProvider` which can resolve services asynchronously.
+
+    the sync api is the same as `ServiceProvider`,
+    and the async api (`aget()`, `aget_many()`, `async with`) awaits the async factories,
+    enters the async context managers into a `AsyncExitStack`.
+
+    a service which has a async factory should always resolve by the async api,
+    otherwise the sync api returns the coroutine object.
+
+    the blocking sync factories (marked by `anyioc.utils.blocking()`) are called
+    in the `executor` when resolve by the async api, so they do not stall the event loop.
+    set `offload_sync_factories` to `True` to treat all sync factories as blocking.
+    if `executor` is `None`, use the default executor of the event loop.
+    '''
+
+    def __init__(self, auto_enter=False, *,
+                executor: Optional[Executor]=None,
+                offload_sync_factories: bool=False,
+                **kwargs):
+        if kwargs.get('_parent') is None:
+            # root provider
+            kwargs['_options'] = dict(
+                executor=executor,
+                offload_sync_factories=offload_sync_factories
+            )
+        super().__init__(auto_enter, **kwargs)
+        self._async_exit_stack = None
+
+        if self._parent is None:
+            # service alias
+            self._services[AsyncServiceProvider] = ProviderServiceInfo()
+
+    async def aget(self, key, d=_NOT_SET) -> Any:
+        '''
+        get a service by key asynchronously.
+
+        raise `ServiceNotFoundError` if the service was not found,
+        unless the default value `d` is provided.
+        '''
+        service_info = self._try_resolve_service_info(key)
+        if service_info is None:
+            if d is _NOT_SET:
+                raise ServiceNotFoundError(key)
+            return d
+        try:
+            profiler = self._root._profiler
+            if profiler is not None:
+                return await profiler.aresolve(key, service_info, self)
+            return await service_info.aget(self)
+        except ServiceNotFoundError as err:
+            raise ServiceNotFoundError(key, *err.resolve_chain)
+
+    async def aget_many(self, key) -> List[Any]:
+        '''
+        get services by key asynchronously.
+        '''
+        _logger.debug('get services by key: %r', key)
+        service_infos = self._resolve_service_infos(key)
+        try:
+            return [await si.aget(self) for si in service_infos]
+        except ServiceNotFoundError as err:
+            raise ServiceNotFoundError(key, *err.resolve_chain)
+
+    async def aenter(self, context: AsyncContextManager[_T]) -> _T:
+        '''
+        enter the async context.
+
+        returns the result of the `context.__aenter__()` method.
+        '''
+        if self._async_exit_stack is None:
+            self._async_exit_stack = AsyncExitStack()
+        return await self._async_exit_stack.enter_async_context(context)
+
+    def scope(self) -> 'AsyncServiceProvider':
+        '''
+        create a scoped service provider which supports the async api.
+        '''
+        return self._add_scope(AsyncServiceProvider(_services=self._services.scope(), _parent=self))
+
+    def __exit__(self, *args):
+        async_exit_stack = self._async_exit_stack
+        super().__exit__(*args)
+        if async_exit_stack is not None:
+            # the async contexts can not be exited from the sync code
+            raise RuntimeError('the async contexts were not exited, use `async with` to exit the provider.')
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *args):
+        exit_stack = AsyncExitStack()
+        # exit the sync contexts and detach from the parent at last
+        exit_stack.push(self.__exit__)
+        if self._async_exit_stack is not None:
+            exit_stack.push_async_exit(self._async_exit_stack)
+            self._async_exit_stack = None
+        # the alive child scopes should exit before the parent
+        for scope in list(self._scopes):
+            if isinstance(scope, AsyncServiceProvider):
+                exit_stack.push_async_exit(scope)
+            else:
+                exit_stack.push(scope)
+        await exit_stack.__aexit__(*args)
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+# the dependency graph of services, build without create any service.
+# ----------
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from logging import getLogger
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from .ioc_service_info import IServiceInfo, LifeTime
+
+_logger = getLogger(__name__)
+
+
+class Dependency(NamedTuple):
+    key: Any
+    # the optional dependency has a default value
+    required: bool
+
+
+class DependencyNode:
+    '''
+    a node of the `DependencyGraph`.
+    '''
+
+    __slots__ = ('key', 'service_info', 'lifetime', 'dependencies', 'dynamic')
+
+    def __init__(self, key, service_info: IServiceInfo, dynamic: bool):
+        self.key = key
+        self.service_info = service_info
+        # `None` if the service info is not a `ServiceInfo`
+        self.lifetime: Optional[LifeTime] = getattr(service_info, '_lifetime', None)
+        self.dependencies: List[Dependency] = [Dependency(*d) for d in service_info.get_dependencies()]
+        # whether the service info is resolved from the missing resolver
+        self.dynamic = dynamic
+
+    def __repr__(self) -> str:
+        return f'<DependencyNode: {self.key!r}, {self.service_info!r}>'
+
+
+class ValidationIssue(NamedTuple):
+    # one of `missing`, `cycle` and `lifetime`
+    kind: str
+    keys: tuple
+    message: str
+
+
+class DependencyGraph:
+    '''
+    the dependency graph of a `ServiceProvider`.
+
+    each node is the service which resolved by the key, and it only contains
+    the known dependencies from the injection metadata, binds and groups.
+    '''
+
+    def __init__(self):
+        self.nodes: Dict[Any, DependencyNode] = {}
+        # the required keys which unable to resolve -> the keys of dependents
+        self.missing: Dict[Any, List[Any]] = {}
+
+    def __contains__(self, key):
+        return key in self.nodes
+
+    def __getitem__(self, key) -> DependencyNode:
+        return self.nodes[key]
+
+    def __iter__(self) -> Iterator[DependencyNode]:
+        return iter(self.nodes.values())
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def dependencies_of(self, key) -> List[Any]:
+        '''
+        get the keys of the resolvable dependencies of the key.
+        '''
+        return [d.key for d in self.nodes[key].dependencies if d.key in self.nodes]
+
+    def dependents_of(self, key) -> List[Any]:
+        '''
+        get the keys of the services which depend on the key.
+        '''
+        return [n.key for n in self.nodes.values() if any(d.key == key for d in n.dependencies)]
+
+    def singleton_dependencies_of(self, key) -> List[Any]:
+        '''
+        get the keys of the singletons which the key depends on,
+        directly or through the non-singleton services.
+        '''
+        result = []
+        visited = {key}
+        stack = [key]
+        while stack:
+            for dep in self.dependencies_of(stack.pop()):
+                if dep in visited:
+                    continue
+                visited.add(dep)
+                if self.nodes[dep].lifetime is LifeTime.singleton:
+                    result.append(dep)
+                else:
+                    stack.append(dep)
+        return result
+
+    def find_cycles(self) -> List[List[Any]]:
+        '''
+        find the circular dependencies, each cycle is a list of keys.
+        '''
+        visiting, visited = 1, 2
+        states: Dict[Any, int] = {}
+        cycles = []
+        seen = set()
+
+        for root in self.nodes:
+            if root in states:
+                continue
+            path = [root]
+            states[root] = visiting
+            stack = [iter(self.dependencies_of(root))]
+            while stack:
+                key = next(stack[-1], None)
+                if key is None:
+                    stack.pop()
+                    states[path.pop()] = visited
+                    continue
+                state = states.get(key)
+                if state is None:
+                    path.append(key)
+                    states[key] = visiting
+                    stack.append(iter(self.dependencies_of(key)))
+                elif state == visiting:
+                    cycle = path[path.index(key):]
+                    # the same cycle may be found from different keys
+                    ident = frozenset(cycle)
+                    if ident not in seen:
+                        seen.add(ident)
+                        cycles.append(cycle)
+
+        return cycles
+
+    def find_lifetime_violations(self) -> List[List[Any]]:
+        '''
+        find the singleton services which capture a scoped service,
+        directly or through the non-cached services.
+
+        each violation is the path from the singleton to the scoped service.
+        '''
+        violations = []
+        for node in self.nodes.values():
+            if node.lifetime is not LifeTime.singleton:
+                continue
+            visited = {node.key}
+            stack = [[node.key]]
+            while stack:
+                path = stack.pop()
+                for key in self.dependencies_of(path[-1]):
+                    if key in visited:
+                        continue
+                    visited.add(key)
+                    lifetime = self.nodes[key].lifetime
+                    if lifetime is LifeTime.scoped:
+                        violations.append(path + [key])
+                    elif lifetime is not LifeTime.singleton:
+                        stack.append(path + [key])
+        return violations
+
+    def get_issues(self) -> List[ValidationIssue]:
+        '''
+        get all issues from the graph.
+        '''
+        issues = []
+        for key, dependents in self.missing.items():
+            issues.append(ValidationIssue('missing', (key, ),
+                f'unknown service: {key!r}; required by: {", ".join(map(repr, dependents))}'))
+        for cycle in self.find_cycles():
+            chain = '->'.join(map(repr, cycle + cycle[:1]))
+            issues.append(ValidationIssue('cycle', tuple(cycle), f'circular dependency: {chain}'))
+        for path in self.find_lifetime_violations():
+            chain = '->'.join(map(repr, path))
+            issues.append(ValidationIssue('lifetime', tuple(path),
+                f'singleton {path[0]!r} captures scoped {path[-1]!r}: {chain}'))
+        return issues
+
+
+def build_dependency_graph(provider) -> DependencyGraph:
+    '''
+    build the `DependencyGraph` from all registered services of the `provider`,
+    and the services which they depend on.
+
+    the factories are never called, but the missing resolver may be called
+    for the keys which are not registered.
+    '''
+    graph = DependencyGraph()
+    pending = [(key, False) for key in provider._services.keys()]
+    pending.reverse()
+    dependents: Dict[Any, List[Any]] = {}
+
+    while pending:
+        key, dynamic = pending.pop()
+        if key in graph.nodes:
+            continue
+        service_info = provider._services.get(key)
+        if service_info is None:
+            service_info = provider._resolve_service_info(key)
+        node = graph.nodes[key] = DependencyNode(key, service_info, dynamic)
+        for dependency in node.dependencies:
+            dependents.setdefault(dependency.key, []).append(key)
+            if dependency.key in graph.nodes or dependency.key in graph.missing:
+                continue
+            if provider._services.get(dependency.key) is not None:
+                pending.append((dependency.key, False))
+                continue
+            if provider._try_resolve_service_info(dependency.key) is None:
+                if dependency.required:
+                    graph.missing[dependency.key] = dependents[dependency.key]
+                continue
+            pending.append((dependency.key, True))
+
+    return graph
+
+
+def warm_up(provider, max_workers: Optional[int]=None) -> Dict[Any, float]:
+    '''
+    create all singletons of the `provider` which are not created yet,
+    the independent singletons are created in parallel on a thread pool,
+    after the singletons which they depend on.
+
+    returns the seconds of each singleton creation, by completed order.
+    '''
+    graph = build_dependency_graph(provider)
+
+    # the same service info may be resolved by different keys
+    singletons: Dict[IServiceInfo, Any] = {}
+    for node in graph:
+        service_info = node.service_info
+        if node.lifetime is LifeTime.singleton and service_info not in singletons:
+            # the async factories must be awaited by the async api
+            if service_info._cache_value is None and not service_info._async:
+                singletons[service_info] = node.key
+
+    dependents: Dict[Any, List[Any]] = {key: [] for key in singletons.values()}
+    remaining: Dict[Any, int] = {}
+    for key in dependents:
+        deps = set()
+        for dep in graph.singleton_dependencies_of(key):
+            dep = singletons.get(graph[dep].service_info)
+            if dep is not None and dep != key:
+                deps.add(dep)
+        remaining[key] = len(deps)
+        for dep in deps:
+            dependents[dep].append(key)
+
+    def create(key):
+        start = perf_counter()
+        graph[key].service_info.get(provider)
+        return perf_counter() - start
+
+    report: Dict[Any, float] = {}
+    with ThreadPoolExecutor(max_workers) as executor:
+        def submit(key):
+            _logger.debug('warm up singleton: %r', key)
+            futures[executor.submit(copy_context().run, create, key)] = key
+
+        futures = {}
+        for key, count in remaining.items():
+            if not count:
+                submit(key)
+        try:
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = futures.pop(future)
+                    report[key] = future.result()
+                    for dependent in dependents[key]:
+                        remaining[dependent] -= 1
+                        if not remaining[dependent]:
+                            submit(dependent)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    # the singletons in circular dependencies, create them lazily as usual
+    for key, count in remaining.items():
+        if count:
+            report[key] = create(key)
+
+    return report
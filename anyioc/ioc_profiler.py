@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+# the profiler of services resolution.
+# ----------
+
+import json
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional
+
+from .ioc_service_info import _EMPTY, IServiceInfo, LifeTime
+
+
+class Histogram:
+    '''
+    a histogram of durations in seconds.
+    '''
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    # the upper bounds of buckets, the last bucket has no upper bound
+    bounds = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)
+    labels = ('<=1us', '<=10us', '<=100us', '<=1ms', '<=10ms', '<=100ms', '<=1s', '>1s')
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> dict:
+        return dict(
+            count=self.count,
+            total=self.total,
+            mean=self.total / self.count if self.count else 0.0,
+            max=self.max,
+            buckets=dict(zip(self.labels, self.counts)),
+        )
+
+
+class ServiceStats:
+    '''
+    the profiling statistics of a key.
+    '''
+
+    __slots__ = ('count', 'hits', 'misses', 'latency', 'construction')
+
+    def __init__(self):
+        # the times of resolution
+        self.count = 0
+        # the cache hits and misses of the singleton and scoped services
+        self.hits = 0
+        self.misses = 0
+        # the durations of all resolutions
+        self.latency = Histogram()
+        # the durations of resolutions which created the service, includes the dependencies
+        self.construction = Histogram()
+
+    def snapshot(self) -> dict:
+        return dict(
+            count=self.count,
+            hits=self.hits,
+            misses=self.misses,
+            latency=self.latency.snapshot(),
+            construction=self.construction.snapshot(),
+        )
+
+
+def _get_is_cached(service_info: IServiceInfo) -> Optional[Callable[[Any], bool]]:
+    '''
+    get a callable with signature `(provider) => bool` which use to check whether the service is cached,
+    or `None` if the service has no cache.
+    '''
+    lifetime = getattr(service_info, '_lifetime', None)
+    if lifetime is LifeTime.singleton:
+        return lambda _: service_info._cache_value is not None
+    if lifetime is LifeTime.scoped:
+        return lambda provider: service_info._get_cached(provider) is not _EMPTY
+    return None
+
+
+class ResolutionProfiler:
+    '''
+    the profiler which records the resolutions of a `ServiceProvider` and it's scopes.
+
+    use `ServiceProvider.enable_profiling()` to create it.
+    '''
+
+    def __init__(self):
+        self._lock = Lock()
+        self._stats: Dict[Any, ServiceStats] = {}
+
+    def _get_stats(self, key) -> ServiceStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(key, ServiceStats())
+        return stats
+
+    def _record(self, stats: ServiceStats, elapsed: float, cached: Optional[bool], created: bool):
+        with self._lock:
+            stats.count += 1
+            stats.latency.add(elapsed)
+            if cached is not None:
+                if cached:
+                    stats.hits += 1
+                else:
+                    stats.misses += 1
+            if created:
+                stats.construction.add(elapsed)
+
+    def wrap_plan(self, key, service_info: IServiceInfo,
+                  plan: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        '''
+        wrap the resolution plan of the key to record it.
+        '''
+        stats = self._get_stats(key)
+        is_cached = _get_is_cached(service_info)
+        creates = getattr(service_info, '_lifetime', None) is not None
+
+        def profiled_plan(provider):
+            cached = None if is_cached is None else is_cached(provider)
+            start = perf_counter()
+            service = plan(provider)
+            elapsed = perf_counter() - start
+            self._record(stats, elapsed, cached, creates and not cached)
+            return service
+
+        return profiled_plan
+
+    async def aresolve(self, key, service_info: IServiceInfo, provider):
+        '''
+        resolve the service asynchronously and record it.
+        '''
+        stats = self._get_stats(key)
+        is_cached = _get_is_cached(service_info)
+        cached = None if is_cached is None else is_cached(provider)
+        start = perf_counter()
+        service = await service_info.aget(provider)
+        elapsed = perf_counter() - start
+        creates = getattr(service_info, '_lifetime', None) is not None
+        self._record(stats, elapsed, cached, creates and not cached)
+        return service
+
+    def reset(self):
+        '''
+        clear all recorded statistics.
+        '''
+        with self._lock:
+            for stats in self._stats.values():
+                stats.__init__()
+
+    def snapshot(self) -> Dict[Any, dict]:
+        '''
+        get the statistics as a dict: key -> stats dict.
+
+        the durations are in seconds.
+        '''
+        with self._lock:
+            return {k: v.snapshot() for k, v in self._stats.items() if v.count}
+
+    def to_json(self, **kwargs) -> str:
+        '''
+        get the statistics as a JSON string, the non-str keys are converted by `repr()`.
+
+        `kwargs` are passed to `json.dumps()`.
+        '''
+        snapshot = self.snapshot()
+        return json.dumps({
+            (k if isinstance(k, str) else repr(k)): v for k, v in snapshot.items()
+        }, **kwargs)
@@ -5,24 +5,59 @@
 #
 # ----------
 
-from typing import List
-from threading import RLock
+import dataclasses
+import inspect
+import typing
+import weakref
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+from threading import Lock, RLock
 from contextlib import nullcontext
 
 from .err import ServiceNotFoundError
+from ._utils import get_injects_dependencies as _get_injects_dependencies
+from ._utils import make_injector as _make_injector
 from .ioc_service_info import ValueServiceInfo, IServiceInfo
 
+_MISSING = object()
+
+# `typing.Annotated` requires python 3.9
+_Annotated = getattr(typing, 'Annotated', None)
+
 class IServiceInfoResolver:
     '''
     the base class for dynamic resolve `IServiceInfo`.
     '''
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # the subclasses only need to override one of `get()` and `try_get()`,
+        # the other one calls the overrided function directly instead of the method,
+        # so the `super()` calls from the subclasses of the subclasses never loop.
+        get = cls.__dict__.get('get')
+        try_get = cls.__dict__.get('try_get')
+        if get is not None and try_get is None:
+            cls.try_get = _make_try_get(get)
+        elif try_get is not None and get is None:
+            cls.get = _make_get(try_get)
+
     def get(self, provider, key) -> IServiceInfo:
         '''
         get the `IServiceInfo` from resolver.
+
+        raise `ServiceNotFoundError` if it was not found.
         '''
         raise ServiceNotFoundError(key)
 
+    def try_get(self, provider, key) -> Optional[IServiceInfo]:
+        '''
+        get the `IServiceInfo` from resolver, or `None` if it was not found.
+
+        unlike `get()`, this does not raise for the misses,
+        which is used by `ServiceProvider` to probe the services.
+        '''
+        return None
+
     def __add__(self, other):
         new_resolver = ServiceInfoChainResolver()
         new_resolver.chain.append(self)
@@ -36,6 +71,42 @@ class IServiceInfoResolver:
         '''
         return CacheServiceInfoResolver(self, sync=sync)
 
+    def lru_cache(self, maxsize: int=1024):
+        '''
+        return a `IServiceInfoResolver` to cache the values and the misses from current `IServiceInfoResolver`,
+        keep at most `maxsize` keys,
+        and drop all of them when any service was registered or disposed in the root provider.
+        '''
+        return LRUCacheServiceInfoResolver(self, maxsize=maxsize)
+
+
+def _make_get(try_get):
+    def get(self, provider, key) -> IServiceInfo:
+        service_info = try_get(self, provider, key)
+        if service_info is None:
+            raise ServiceNotFoundError(key)
+        return service_info
+    get.__doc__ = IServiceInfoResolver.get.__doc__
+    return get
+
+def _make_try_get(get):
+    def try_get(self, provider, key) -> Optional[IServiceInfo]:
+        try:
+            return get(self, provider, key)
+        except ServiceNotFoundError:
+            return None
+    try_get.__doc__ = IServiceInfoResolver.try_get.__doc__
+    return try_get
+
+def _try_get_by_get(resolver, provider, key) -> Optional[IServiceInfo]:
+    '''
+    call the `get()` of a resolver which does not inherit from `IServiceInfoResolver`.
+    '''
+    try:
+        return resolver.get(provider, key)
+    except ServiceNotFoundError:
+        return None
+
 
 class ServiceInfoChainResolver(IServiceInfoResolver):
     '''
@@ -45,13 +116,12 @@ class ServiceInfoChainResolver(IServiceInfoResolver):
     def __init__(self, *resolvers):
         self.chain: List[IServiceInfoResolver] = list(resolvers)
 
-    def get(self, provider, key):
+    def try_get(self, provider, key):
         for resolver in self.chain:
-            try:
-                return resolver.get(provider, key)
-            except ServiceNotFoundError:
-                pass
-        return super().get(provider, key)
+            service_info = resolver.try_get(provider, key)
+            if service_info is not None:
+                return service_info
+        return None
 
     def append(self, other):
         if isinstance(other, ServiceInfoChainResolver):
@@ -81,18 +151,16 @@ class CacheServiceInfoResolver(IServiceInfoResolver):
         self._cache = {}
         self._lock = RLock() if sync else nullcontext()
 
-    def get(self, provider, key):
-        try:
-            return self._cache[key]
-        except KeyError:
-            pass
+    def try_get(self, provider, key):
+        service_info = self._cache.get(key)
+        if service_info is not None:
+            return service_info
         with self._lock:
-            try:
-                return self._cache[key]
-            except KeyError:
-                pass
-            service_info = self._base_resolver.get(provider, key)
-            self._cache[key] = service_info
+            service_info = self._cache.get(key)
+            if service_info is None:
+                service_info = self._base_resolver.try_get(provider, key)
+                if service_info is not None:
+                    self._cache[key] = service_info
             return service_info
 
     def cache(self, *, sync=False):
@@ -101,12 +169,87 @@ class CacheServiceInfoResolver(IServiceInfoResolver):
         return self
 
 
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCacheServiceInfoResolver(IServiceInfoResolver):
+    '''
+    a helper resolver for cache values and misses from other `IServiceInfoResolver`,
+    with a size bound and LRU eviction.
+
+    the cached entries are dropped when any service was registered or disposed
+    in the root provider which resolve it, the registrations of the scopes are ignored,
+    so the per-request values from the scopes do not drop the cache.
+
+    NOTE:
+    like `CacheServiceInfoResolver`, if a `IServiceInfo` is affect by `provider`, you should not cache it.
+    '''
+
+    def __init__(self, base_resolver: IServiceInfoResolver, *, maxsize: int=1024):
+        super().__init__()
+        if maxsize <= 0:
+            raise ValueError('maxsize must be positive')
+        self._base_resolver = base_resolver
+        self._maxsize = maxsize
+        # key -> (generation, service info or `_MISSING`)
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def try_get(self, provider, key):
+        generation = provider._services.generation
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == generation:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                service_info = entry[1]
+            else:
+                self.misses += 1
+                service_info = None
+
+        if service_info is None:
+            service_info = self._base_resolver.try_get(provider, key)
+            if service_info is None:
+                service_info = _MISSING
+            with self._lock:
+                cache = self._cache
+                cache[key] = (generation, service_info)
+                cache.move_to_end(key)
+                if len(cache) > self._maxsize:
+                    cache.popitem(last=False)
+
+        if service_info is _MISSING:
+            return None
+        return service_info
+
+    def cache_info(self) -> CacheInfo:
+        '''
+        get the statistics of the cache.
+        '''
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self._maxsize, len(self._cache))
+
+    def cache_clear(self):
+        '''
+        clear the cache and the statistics.
+        '''
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
 class ImportServiceInfoResolver(IServiceInfoResolver):
     '''
     dynamic resolve `IServiceInfo` if the key is a package name.
     '''
 
-    def get(self, provider, key):
+    def try_get(self, provider, key):
         import importlib
         if isinstance(key, str):
             try:
@@ -116,18 +259,22 @@ class ImportServiceInfoResolver(IServiceInfoResolver):
                 pass
             except ModuleNotFoundError:
                 pass
-        return super().get(provider, key)
+        return None
 
 
 class SimpleServiceInfo(IServiceInfo):
-    __slots__ = ('_factory')
+    __slots__ = ('_factory', 'cacheable')
 
-    def __init__(self, factory):
+    def __init__(self, factory, *, cacheable=False):
         self._factory = factory
+        self.cacheable = cacheable
 
     def get(self, provider):
         return self._factory(provider)
 
+    def get_dependencies(self):
+        return _get_injects_dependencies(getattr(self._factory, '__anyioc_injects__', None))
+
 
 class TypesServiceInfoResolver(IServiceInfoResolver):
     '''
@@ -136,32 +283,195 @@ class TypesServiceInfoResolver(IServiceInfoResolver):
 
     inject_by = None
 
-    def get(self, provider, key):
+    def try_get(self, provider, key):
         if isinstance(key, type):
             factory = self.inject_by(key) if self.inject_by else key
-            return SimpleServiceInfo(factory)
-        return super().get(provider, key)
+            return SimpleServiceInfo(factory, cacheable=True)
+        return None
 
 
 class TypeNameServiceInfoResolver(IServiceInfoResolver):
     '''
     dynamic resolve `IServiceInfo` if the key is a type name or qualname.
+
+    the types are looked up from a index over all classes, the index is rebuilt when a name was not found,
+    so the classes which created later are found too.
+    the names which were still not found are remembered until any service was registered or disposed
+    in the root provider, call `invalidate()` to forget them.
     '''
 
     inject_by = None
 
-    def _get_type(self, key):
+    def __init__(self):
+        super().__init__()
+        # name or qualname -> class, the first one wins
+        self._index: Optional[weakref.WeakValueDictionary] = None
+        # (generation, the names which were not found)
+        self._misses = (None, frozenset())
+
+    @staticmethod
+    def _build_index() -> weakref.WeakValueDictionary:
+        index = weakref.WeakValueDictionary()
+        seen = {id(object)}
+        pending = deque([object])
+        while pending:
+            for klass in type.__subclasses__(pending.popleft()):
+                if id(klass) in seen:
+                    continue # from multiple inheritance
+                seen.add(id(klass))
+                pending.append(klass)
+                for name in (getattr(klass, '__name__', None), getattr(klass, '__qualname__', None)):
+                    if isinstance(name, str):
+                        index.setdefault(name, klass)
+        return index
+
+    def invalidate(self):
+        '''
+        forget the names which were not found, so they will rebuild the index on next lookup.
+        '''
+        self._misses = (None, frozenset())
+
+    def _get_type(self, provider, key):
         if isinstance(key, str):
-            for klass in object.__subclasses__():
-                if getattr(klass, '__name__', None) == key:
-                    return klass
-                if getattr(klass, '__qualname__', None) == key:
+            index = self._index
+            if index is not None:
+                klass = index.get(key)
+                if klass is not None:
                     return klass
+            generation = provider._services.generation
+            misses_generation, misses = self._misses
+            if misses_generation == generation and key in misses:
+                return None
+            index = self._index = self._build_index()
+            klass = index.get(key)
+            if klass is None:
+                if misses_generation != generation:
+                    misses = frozenset()
+                self._misses = (generation, misses | {key})
+            return klass
         # None
 
-    def get(self, provider, key):
-        klass = self._get_type(str)
+    def try_get(self, provider, key):
+        klass = self._get_type(provider, key)
         if klass is not None:
             factory = self.inject_by(klass) if self.inject_by else klass
             return SimpleServiceInfo(factory)
-        return super().get(provider, key)
+        return None
+
+
+class Inject:
+    '''
+    the metadata of `typing.Annotated` which use to specify the key to inject:
+
+    ``` py
+    class Service:
+        def __init__(self, logger: Annotated[Logger, Inject('logger')]):
+            ...
+    ```
+    '''
+
+    __slots__ = ('key', )
+
+    def __init__(self, key):
+        self.key = key
+
+    def __repr__(self) -> str:
+        return f'Inject({self.key!r})'
+
+
+def _get_type_hints(obj) -> Dict[str, Any]:
+    try:
+        if _Annotated is None:
+            return typing.get_type_hints(obj)
+        return typing.get_type_hints(obj, include_extras=True)
+    except Exception: # unable to resolve the forward references
+        return getattr(obj, '__annotations__', {})
+
+def _get_inject_item(param: inspect.Parameter, anno) -> Optional[tuple]:
+    '''
+    get the `(key, )` or `(key, default)` item for the parameter, or `None` to use the default value.
+    '''
+    default = param.default
+
+    if _Annotated is not None and typing.get_origin(anno) is _Annotated:
+        anno, *metadata = typing.get_args(anno)
+        for item in metadata:
+            if isinstance(item, Inject):
+                return (item.key, ) if default is param.empty else (item.key, default)
+
+    if typing.get_origin(anno) is Union:
+        args = [a for a in typing.get_args(anno) if a is not type(None)]
+        if len(args) == 1 and len(typing.get_args(anno)) == 2:
+            # Optional[T]
+            return (args[0], None if default is param.empty else default)
+
+    if anno is param.empty or isinstance(anno, str):
+        if default is not param.empty:
+            return None
+        # unable to know the type, use the name as key
+        return (param.name, )
+
+    return (anno, ) if default is param.empty else (anno, default)
+
+
+class AutowireServiceInfoResolver(IServiceInfoResolver):
+    '''
+    dynamic resolve `IServiceInfo` if the key is a concrete and non-builtin class,
+    inject the arguments of the constructor by the annotations:
+
+    - `Annotated[T, Inject(key)]`: inject by the `key`;
+    - `T` or `Optional[T]`: inject by `T`, `Optional[T]` is default to `None`;
+    - no annotation: inject by the parameter name, unless it has a default value.
+
+    the dataclasses are supported as well.
+
+    the injection plan of each class is analyzed once and cached,
+    the created services are transient.
+    the `ServiceProvider` caches the resolution plans of them until the root was changed.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        # class -> service info, or `None` if the class can not be autowired
+        self._service_infos: Dict[type, Optional[IServiceInfo]] = {}
+
+    def try_get(self, provider, key):
+        if isinstance(key, type):
+            try:
+                return self._service_infos[key]
+            except KeyError:
+                return self._service_infos.setdefault(key, self._create_service_info(key))
+        return None
+
+    def _create_service_info(self, klass: type) -> Optional[IServiceInfo]:
+        if inspect.isabstract(klass) or klass.__module__ == 'builtins':
+            # the builtin types like `int` should not be created from nothing
+            return None
+        try:
+            params = inspect.signature(klass).parameters.values()
+        except (TypeError, ValueError): # no signature
+            return None
+
+        if dataclasses.is_dataclass(klass):
+            hints = _get_type_hints(klass)
+        else:
+            hints = _get_type_hints(klass.__init__)
+
+        pos_args = []
+        kw_args = {}
+        pos_only = True
+        for param in params:
+            if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+            item = _get_inject_item(param, hints.get(param.name, param.annotation))
+            if param.kind == param.POSITIONAL_ONLY:
+                # the rest positional only args are unable to pass after a skipped one
+                pos_only = pos_only and item is not None
+                if pos_only:
+                    pos_args.append(item)
+            elif item is not None:
+                kw_args[param.name] = item
+
+        factory = _make_injector(klass, pos_args, kw_args)
+        factory.__anyioc_injects__ = (klass, pos_args, kw_args)
+        return SimpleServiceInfo(factory, cacheable=True)
@@ -5,17 +5,268 @@
 #
 # ----------
 
+import asyncio
 import inspect
 from abc import ABC, abstractmethod
-from contextlib import nullcontext
+from concurrent.futures import Future
+from contextvars import ContextVar, copy_context
 from enum import Enum
-from threading import RLock
-from typing import Any, Tuple, overload
-
+from heapq import heappop as _heappop
+from heapq import heappush as _heappush
+from itertools import count
+from threading import Lock, RLock
+from threading import get_ident as _get_ident
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, overload
+
+from ._utils import get_caller_frame as _get_caller_frame
+from ._utils import get_injects_dependencies as _get_injects_dependencies
+from ._utils import is_injector as _is_injector
 from ._utils import wrap_signature as _wrap_signature
+from .err import CircularDependencyError
 from .symbols import Symbols
 
-_NULL_CONTEXT = nullcontext()
+_EMPTY = object()
+
+# the async service infos which are creating in current context,
+# as a linked list: (service info, provider, key, next node).
+# the sync ones are tracked by the idents of the creating threads, which is cheaper.
+#
+# a service info is only a cycle when it is creating again from the same provider,
+# the child scopes are allowed to create the same scoped or transient service.
+_resolving: 'ContextVar[Optional[Tuple[IServiceInfo, Any, Any, Any]]]' = ContextVar(
+    'anyioc_resolving', default=None)
+
+def _check_resolving(service_info, provider, key):
+    '''
+    raise `CircularDependencyError` if the service info is creating from the provider in current context.
+    '''
+    node = path = _resolving.get()
+    while node is not None:
+        if node[0] is service_info and node[1] is provider:
+            cycle = [key]
+            node = path
+            while node[0] is not service_info or node[1] is not provider:
+                cycle.append(node[2])
+                node = node[3]
+            cycle.append(key)
+            cycle.reverse()
+            raise CircularDependencyError(*cycle)
+        node = node[3]
+
+def _enter_resolving(service_info, provider, key):
+    '''
+    push the service info into the resolving path of current context,
+    raise `CircularDependencyError` if it is already in.
+
+    returns the token for `_resolving.reset()`.
+    '''
+    _check_resolving(service_info, provider, key)
+    return _resolving.set((service_info, provider, key, _resolving.get()))
+
+def _push_creating(service_info, provider, outer):
+    '''
+    call when the sync service info is creating by current thread already,
+    `outer` is the provider or the tuple of providers which are creating it.
+
+    raise `CircularDependencyError` if one of them is the provider,
+    otherwise returns the new tuple of providers.
+    '''
+    outers = outer if type(outer) is tuple else (outer, )
+    for item in outers:
+        if item is provider:
+            _raise_circular(service_info, provider)
+    return outers + (provider, )
+
+_creating_lock = Lock()
+
+def _call_tracked(service_info, provider, func, arg):
+    '''
+    call `func(arg)` and track the creating providers of the sync service info by the thread ident.
+
+    the tracking costs too much for the hot path, so it only runs
+    when the service info is creating already (by any thread, see `_entered`),
+    which means a cycle is detected when the key repeats the second time.
+    '''
+    ident = _get_ident()
+    creating = service_info._creating
+    if creating is None:
+        # most service infos never need it, so it is created on first use
+        with _creating_lock:
+            creating = service_info._creating
+            if creating is None:
+                creating = service_info._creating = {}
+    outer = creating.get(ident)
+    creating[ident] = provider if outer is None else _push_creating(service_info, provider, outer)
+    try:
+        return func(arg)
+    finally:
+        if outer is None:
+            del creating[ident]
+        else:
+            creating[ident] = outer
+
+def _raise_circular(service_info, provider):
+    '''
+    raise a `CircularDependencyError` from the repeated sync service info,
+    the frames of the cycle prepend their keys by `_unwind_circular()` while it propagates,
+    from the repeated one to the first one.
+    '''
+    err = CircularDependencyError()
+    err._anyioc_origin = (service_info, provider)
+    raise err
+
+def _unwind_circular(err: CircularDependencyError, service_info, provider, key):
+    origin = getattr(err, '_anyioc_origin', None)
+    if origin is not None:
+        closed = err.cycle and origin[0] is service_info and origin[1] is provider
+        err.cycle = (key, ) + err.cycle
+        if closed:
+            err._anyioc_origin = None
+
+class ScopedSlots:
+    '''
+    the allocator of the slots for the scoped service infos of a root provider,
+    a slot is the index of `ServiceProvider._scoped_instances`.
+
+    the slot is released after the service info was collected,
+    which means it was disposed and all scopes which cached it were gone,
+    so the slots (and the lists of the scopes) do not grow with the dropped registrations.
+    '''
+
+    __slots__ = ('_counter', '_free')
+
+    def __init__(self):
+        self._counter = count()
+        self._free = []
+
+    def acquire(self) -> int:
+        # lock free, `heappop()` on ints and `next()` are atomic.
+        # the lowest slot first, so the lists of the scopes keep short.
+        try:
+            return _heappop(self._free)
+        except IndexError:
+            return next(self._counter)
+
+    def release(self, slot: int):
+        # called from `__del__`, so it must not take any lock
+        _heappush(self._free, slot)
+
+# the constructions in flight for async resolution, key -> future.
+# the futures are thread safe, so the callers from different event loops can await the same one.
+_pendings: 'Dict[Any, Future]' = {}
+
+
+async def _single_flight(key, get_cached: Callable[[], Any], create: Callable[[], Any]):
+    '''
+    await the `create()` only once for the same key at the same time,
+    other callers await the result of the same construction, even from other event loops.
+
+    `create()` must cache the result before returns,
+    and `get_cached()` returns the cached result or `_EMPTY`.
+
+    if the construction failed, the error propagates to all waiters and nothing is cached.
+    '''
+    while True:
+        service = get_cached()
+        if service is not _EMPTY:
+            return service
+
+        pending = _pendings.get(key)
+        if pending is None:
+            pending = Future()
+            if _pendings.setdefault(key, pending) is not pending:
+                continue # other one claimed it
+            try:
+                service = await create()
+            except asyncio.CancelledError:
+                pending.cancel()
+                raise
+            except BaseException as e:
+                pending.set_exception(e)
+                raise
+            finally:
+                del _pendings[key]
+            pending.set_result(service)
+            return service
+
+        try:
+            return await asyncio.shield(asyncio.wrap_future(pending))
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # the caller who created the service was cancelled, retry
+
+
+def _can_get_item_sync(provider, item, seen: dict) -> bool:
+    '''
+    whether the `(key, )` or `(key, default)` item can be got by the sync api without change the result,
+    `seen` is the results of the visited service infos.
+    '''
+    service_info = provider._try_resolve_service_info(item[0])
+    if service_info is None:
+        return len(item) == 2
+    seen_key = (id(service_info), id(provider))
+    result = seen.get(seen_key)
+    if result is None:
+        # a cycle is never sync, the async api will report it
+        seen[seen_key] = False
+        result = seen[seen_key] = service_info._can_get_sync(provider, seen)
+    return result
+
+async def _agather(provider, items):
+    '''
+    resolve the `(key, )` or `(key, default)` items concurrently.
+
+    the items which are cached or created by sync code are got inline by the sync api,
+    others run in their own tasks from `asyncio.gather()`,
+    so they can use the features of the task, like `asyncio.timeout()`.
+    '''
+    values = [None] * len(items)
+    pending = []
+    seen = {}
+    for index, item in enumerate(items):
+        if _can_get_item_sync(provider, item, seen):
+            values[index] = provider.get(*item) if len(item) == 2 else provider[item[0]]
+        else:
+            pending.append(index)
+
+    if len(pending) == 1:
+        index, = pending
+        values[index] = await provider.aget(*items[index])
+    elif pending:
+        results = await asyncio.gather(*[provider.aget(*items[index]) for index in pending])
+        for index, value in zip(pending, results):
+            values[index] = value
+    return values
+
+async def _run_blocking(provider, func, *args, **kwargs):
+    '''
+    call the blocking func in the executor from the provider options,
+    so the event loop can keep serving others.
+    '''
+    executor = provider[Symbols.provider_options].get('executor')
+    context = copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, lambda: context.run(func, *args, **kwargs))
+
+async def _acall_injected(provider, func, pos_args, kw_args, blocking: bool):
+    '''
+    call the func from `anyioc.utils.injectable()`,
+    and resolve the independent arguments concurrently.
+    '''
+    values = await _agather(provider, list(pos_args) + list(kw_args.values()))
+    args = values[:len(pos_args)]
+    kwargs = dict(zip(kw_args, values[len(pos_args):]))
+    if blocking:
+        return await _run_blocking(provider, func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+def _is_blocking(func) -> bool:
+    '''
+    whether the func is marked by `anyioc.utils.blocking()`.
+    '''
+    return getattr(func, '__anyioc_blocking__', False) or \
+        getattr(getattr(func, '__anyioc_wrapped__', None), '__anyioc_blocking__', False)
 
 
 class LifeTime(Enum):
@@ -27,100 +278,355 @@ class LifeTime(Enum):
 class IServiceInfo(ABC):
     __slots__ = ()
 
+    # whether the `ServiceProvider` can cache the plan of it when it comes from the missing resolver,
+    # the resolvers set it when they resolve the same service for the key until the root was changed.
+    cacheable = False
+
     @abstractmethod
     def get(self, provider) -> Any:
         raise NotImplementedError
 
+    def get_plan(self) -> Callable[[Any], Any]:
+        '''
+        get a callable with signature `(provider) => any` which use to resolve the service.
+
+        the result may be cached by the `ServiceProvider` until the key was changed.
+        '''
+        return self.get
+
+    async def aget(self, provider) -> Any:
+        '''
+        get the service from a `AsyncServiceProvider`.
+        '''
+        return self.get(provider)
+
+    def _can_get_sync(self, provider, seen: dict) -> bool:
+        '''
+        whether `get()` returns the same as `aget()`, so the async api can call it without await,
+        that means the service is cached or created by sync code only.
+
+        `seen` is the results of the visited service infos, see `_can_get_item_sync()`.
+        '''
+        return type(self).aget is IServiceInfo.aget
+
+    def get_dependencies(self) -> Iterable[Tuple[Any, bool]]:
+        '''
+        get the known dependencies as `(key, required)` pairs, without create the service.
+
+        use for analysis only, the unknown dependencies are not included.
+        '''
+        return ()
+
 
 class ServiceInfo(IServiceInfo):
-    '''generic `IServiceInfo`.'''
+    '''
+    generic `IServiceInfo`.
+
+    `ServiceInfo(...)` returns the implementation for the `lifetime`.
+    '''
 
     __slots__ = (
-        '_key', '_lifetime', '_factory', '_factory_origin',
-        # for not transient
-        '_lock',
-        # for singleton
-        '_cache_value', '_service_provider',
-        # options
-        '_options',
+        '_key', '_factory', '_factory_origin',
+        # whether enter the service after created, computed on registered
+        '_auto_enter', '_auto_aenter',
+        # the injection metadata from `anyioc.utils.injectable()`,
+        # only when the factory is the injector itself, so the async api can resolve the arguments by itself.
+        '_injects',
+        # whether call the sync factory in the executor when resolve by async api
+        '_offload',
+        # whether the factory is a coroutine function
+        '_async',
+        # the count of the running creations from all threads, a cheap hint for the cycle detection.
+        # it is not exact without lock, but a wrong count only costs the exact tracking.
+        '_entered',
+        # the thread ident -> the provider (or the tuple of providers) which is creating the service,
+        # created on first use by `_call_tracked()`.
+        '_creating',
     )
 
+    _lifetime: LifeTime
+
     _not_allowed_keys = frozenset([
         Symbols.provider_options,
         Symbols.cache,
     ])
 
-    def __init__(self, service_provider, key, factory, lifetime):
+    def __new__(cls, service_provider, key, factory, lifetime=None):
+        if cls is ServiceInfo:
+            try:
+                cls = _SERVICE_INFO_TYPES[lifetime]
+            except KeyError:
+                raise NotImplementedError(f'what is {lifetime}?')
+        return super().__new__(cls)
+
+    def __init__(self, service_provider, key, factory, lifetime=None):
         if key in self._not_allowed_keys:
             raise ValueError(f'key {key!r} is not allowed')
+        assert lifetime is None or lifetime is self._lifetime
 
         self._factory_origin = factory
         self._factory = _wrap_signature(factory)
-
+        injects = getattr(self._factory, '__anyioc_injects__', None)
+        # the decorators from `functools.wraps()` copy the metadata too, but they must be called
+        self._injects = injects if _is_injector(self._factory) else None
         self._key = key
-        self._lifetime = lifetime
-        self._cache_value = None
-        self._service_provider = service_provider
-        self._options: dict = service_provider[Symbols.provider_options]
-
-        if self._lifetime != LifeTime.transient:
-            self._lock = RLock()
+        self._entered = 0
+        self._creating = None
+
+        options = service_provider[Symbols.provider_options]
+        wrapped = getattr(self._factory, '__anyioc_wrapped__', self._factory)
+        if options['auto_enter'] and isinstance(wrapped, type):
+            self._auto_enter = hasattr(wrapped, '__enter__') and hasattr(wrapped, '__exit__')
+            self._auto_aenter = hasattr(wrapped, '__aenter__') and hasattr(wrapped, '__aexit__')
         else:
-            self._lock = _NULL_CONTEXT
+            self._auto_enter = self._auto_aenter = False
 
-        if self._lifetime == LifeTime.singleton:
-            # service_provider is required when lifetime == singleton
-            assert self._service_provider is not None
+        target = wrapped if injects is None else injects[0]
+        target = getattr(target, '__anyioc_wrapped__', target)
+        self._async = inspect.iscoroutinefunction(target)
+        if self._async:
+            self._offload = False
+        else:
+            self._offload = _is_blocking(self._factory) or _is_blocking(target) or \
+                options.get('offload_sync_factories', False)
 
     def __repr__(self) -> str:
         return f'<Service: {self._lifetime}, {self._factory_origin!r}>'
 
-    def get(self, provider):
-        if self._lifetime is LifeTime.transient:
-            return self._create(provider)
+    def get_dependencies(self):
+        return _get_injects_dependencies(getattr(self._factory, '__anyioc_injects__', None))
+
+    def _is_sync_factory(self, provider, seen: dict) -> bool:
+        '''
+        whether the factory (and the injected dependencies) can be called by the sync api
+        without change the result.
+        '''
+        if self._async or self._auto_aenter:
+            return False
+        injects = self._injects
+        if injects is None:
+            return True
+        _, pos_args, kw_args = injects
+        return all(_can_get_item_sync(provider, item, seen) for item in (*pos_args, *kw_args.values()))
 
-        if self._lifetime is LifeTime.scoped:
-            return self._from_scoped(provider)
+    def _can_get_sync(self, provider, seen):
+        return not self._offload and self._is_sync_factory(provider, seen)
 
-        if self._lifetime is LifeTime.singleton:
-            return self._from_singleton()
+    def _create(self, provider):
+        '''
+        return the finally service instance.
+        '''
 
-        raise NotImplementedError(f'what is {self._lifetime}?')
+        # a thread can not create the same service from the same provider again before the first one finished.
+        # the async resolution runs sync code without switching, so it is also safe for it.
+        entered = self._entered
+        self._entered = entered + 1
+        try:
+            if entered:
+                service = _call_tracked(self, provider, self._factory, provider)
+            else:
+                service = self._factory(provider)
+        except CircularDependencyError as err:
+            _unwind_circular(err, self, provider, self._key)
+            raise
+        finally:
+            self._entered -= 1
+        if self._auto_enter:
+            service = provider.enter(service)
+        return service
 
-    def _from_scoped(self, provider):
-        cache: dict = provider[Symbols.cache]
+    async def _acreate(self, provider):
+        '''
+        return the finally service instance, await it if the factory is async.
+        '''
+
+        token = _enter_resolving(self, provider, self._key)
         try:
-            return cache[self]
-        except KeyError:
-            pass
-        with self._lock:
+            if self._injects is not None:
+                service = await _acall_injected(provider, *self._injects, self._offload)
+            elif self._offload:
+                service = await _run_blocking(provider, self._factory, provider)
+            else:
+                service = self._factory(provider)
+            if inspect.isawaitable(service):
+                service = await service
+        finally:
+            _resolving.reset(token)
+        if self._auto_aenter:
+            service = await provider.aenter(service)
+        elif self._auto_enter:
+            service = provider.enter(service)
+        return service
+
+
+class TransientServiceInfo(ServiceInfo):
+    '''the `ServiceInfo` for `LifeTime.transient`.'''
+
+    __slots__ = ()
+
+    _lifetime = LifeTime.transient
+
+    def get(self, provider):
+        return self._create(provider)
+
+    def get_plan(self):
+        return self._create
+
+    async def aget(self, provider):
+        return await self._acreate(provider)
+
+
+class ScopedServiceInfo(ServiceInfo):
+    '''the `ServiceInfo` for `LifeTime.scoped`.'''
+
+    __slots__ = ('_slot', '_slots')
+
+    _lifetime = LifeTime.scoped
+
+    def __init__(self, service_provider, key, factory, lifetime=None):
+        super().__init__(service_provider, key, factory, lifetime)
+        # the slot is owned by the root provider,
+        # the providers from other roots store the instances by a dict.
+        slots: ScopedSlots = service_provider._scoped_slots
+        self._slot = slots.acquire()
+        self._slots = slots
+
+    def __del__(self):
+        slots = getattr(self, '_slots', None)
+        if slots is not None:
+            slots.release(self._slot)
+
+    def _get_cached(self, provider):
+        '''
+        get the cached service from the scope, or `_EMPTY` if it was not created.
+        '''
+        if provider._scoped_slots is not self._slots:
+            return provider._foreign_scoped_instances.get(self, _EMPTY)
+        instances: list = provider._scoped_instances
+        slot = self._slot
+        # the entry keeps the service info alive, so the slot can not be reused when it is cached
+        entry = instances[slot] if slot < len(instances) else _EMPTY
+        return entry if entry is _EMPTY else entry[1]
+
+    def _set_cached(self, provider, service):
+        if provider._scoped_slots is not self._slots:
+            provider._foreign_scoped_instances[self] = service
+            return
+        instances: list = provider._scoped_instances
+        slot = self._slot
+        if slot >= len(instances):
+            instances.extend([_EMPTY] * (slot + 1 - len(instances)))
+        instances[slot] = (self, service)
+
+    def get(self, provider):
+        if provider._scoped_slots is self._slots:
             try:
-                return cache[self]
-            except KeyError:
+                entry = provider._scoped_instances[self._slot]
+                if entry is not _EMPTY:
+                    return entry[1]
+            except IndexError:
+                pass
+        # scoped services use the lock from the scope
+        with provider._get_scoped_lock():
+            service = self._get_cached(provider)
+            if service is _EMPTY:
                 service = self._create(provider)
-                cache[self] = service
-                return service
+                self._set_cached(provider, service)
+            return service
+
+    async def aget(self, provider):
+        service = self._get_cached(provider)
+        if service is not _EMPTY:
+            return service
+        # the waiters of single flight never wake up on a cycle
+        _check_resolving(self, provider, self._key)
+
+        async def create():
+            service = await self._acreate(provider)
+            self._set_cached(provider, service)
+            return service
+
+        return await _single_flight((provider, self), lambda: self._get_cached(provider), create)
+
+    def _can_get_sync(self, provider, seen):
+        if self._get_cached(provider) is not _EMPTY:
+            return True
+        # join the construction in flight
+        return (provider, self) not in _pendings and super()._can_get_sync(provider, seen)
+
+
+class SingletonServiceInfo(ServiceInfo):
+    '''the `ServiceInfo` for `LifeTime.singleton`.'''
+
+    __slots__ = ('_lock', '_cache_value', '_service_provider')
+
+    _lifetime = LifeTime.singleton
 
-    def _from_singleton(self):
-        if self._cache_value is None:
+    def __init__(self, service_provider, key, factory, lifetime=None):
+        super().__init__(service_provider, key, factory, lifetime)
+        # service_provider is required when lifetime == singleton
+        assert service_provider is not None
+        self._service_provider = service_provider
+        self._cache_value = None
+        self._lock = RLock()
+
+    def get(self, provider):
+        cache_value = self._cache_value
+        if cache_value is None:
             with self._lock:
-                if self._cache_value is None:
-                    self._cache_value = (
+                cache_value = self._cache_value
+                if cache_value is None:
+                    cache_value = self._cache_value = (
                         self._create(self._service_provider), )
-        return self._cache_value[0]
+        return cache_value[0]
+
+    def get_plan(self):
+        cache_value = self._cache_value
+        if cache_value is not None:
+            value = cache_value[0]
+            return lambda _: value
+        return self.get
+
+    async def aget(self, provider):
+        cache_value = self._cache_value
+        if cache_value is not None:
+            return cache_value[0]
+        # the waiters of single flight never wake up on a cycle
+        _check_resolving(self, self._service_provider, self._key)
+
+        def get_cached():
+            cache_value = self._cache_value
+            return _EMPTY if cache_value is None else cache_value[0]
+
+        async def create():
+            provider = self._service_provider
+            if self._is_sync_factory(provider, {}):
+                # create it by the sync api, which shares the lock with other threads
+                if self._offload:
+                    return await _run_blocking(provider, self.get, provider)
+                return self.get(provider)
+            service = await self._acreate(provider)
+            with self._lock:
+                # the sync api may created it while awaiting
+                cache_value = self._cache_value
+                if cache_value is None:
+                    cache_value = self._cache_value = (service, )
+            return cache_value[0]
 
-    def _create(self, provider):
-        '''
-        return the finally service instance.
-        '''
+        return await _single_flight(self, get_cached, create)
 
-        service = self._factory(provider)
-        if self._options['auto_enter']:
-            wrapped = getattr(
-                self._factory, '__anyioc_wrapped__', self._factory)
-            if isinstance(wrapped, type) and hasattr(wrapped, '__enter__') and hasattr(wrapped, '__exit__'):
-                service = provider.enter(service)
-        return service
+    def _can_get_sync(self, provider, seen):
+        if self._cache_value is not None:
+            return True
+        # join the construction in flight
+        return self not in _pendings and super()._can_get_sync(self._service_provider, seen)
+
+
+_SERVICE_INFO_TYPES = {
+    LifeTime.transient: TransientServiceInfo,
+    LifeTime.scoped: ScopedServiceInfo,
+    LifeTime.singleton: SingletonServiceInfo,
+}
 
 
 class ProviderServiceInfo(IServiceInfo):
@@ -173,38 +679,92 @@ class ValueServiceInfo(IServiceInfo):
 class GroupedServiceInfo(IServiceInfo):
     '''a `IServiceInfo` use for get multi values as a tuple from keys list.'''
 
-    __slots__ = ('_keys')
+    __slots__ = ('_keys', '_key', '_entered', '_creating')
 
-    def __init__(self, keys: list):
+    def __init__(self, keys: list, key=None):
         self._keys = keys
+        # the registered key, use for error message only
+        self._key = key
+        self._entered = 0
+        self._creating = None
 
-    def get(self, provider):
+    def _get_values(self, provider):
         return tuple(provider[k] for k in self._keys)
 
+    def get(self, provider):
+        entered = self._entered
+        self._entered = entered + 1
+        try:
+            if entered:
+                return _call_tracked(self, provider, self._get_values, provider)
+            return self._get_values(provider)
+        except CircularDependencyError as err:
+            _unwind_circular(err, self, provider, self._key)
+            raise
+        finally:
+            self._entered -= 1
+
+    async def aget(self, provider):
+        token = _enter_resolving(self, provider, self._key)
+        try:
+            return tuple(await _agather(provider, [(k, ) for k in self._keys]))
+        finally:
+            _resolving.reset(token)
+
+    def _can_get_sync(self, provider, seen):
+        return all(_can_get_item_sync(provider, (k, ), seen) for k in self._keys)
+
+    def get_dependencies(self):
+        return [(k, True) for k in self._keys]
+
 
 class BindedServiceInfo(IServiceInfo):
     '''a `IServiceInfo` use for get value from target key.'''
 
-    __slots__ = ('_target_key')
+    __slots__ = ('_target_key', '_key', '_entered', '_creating')
 
-    def __init__(self, target_key):
+    def __init__(self, target_key, key=None):
         self._target_key = target_key
+        # the registered key, use for error message only
+        self._key = key
+        self._entered = 0
+        self._creating = None
 
     def __repr__(self) -> str:
         return f'<Binded: {self._target_key!r}>'
 
     def get(self, provider):
-        return provider[self._target_key]
+        entered = self._entered
+        self._entered = entered + 1
+        try:
+            if entered:
+                return _call_tracked(self, provider, provider.__getitem__, self._target_key)
+            return provider[self._target_key]
+        except CircularDependencyError as err:
+            _unwind_circular(err, self, provider, self._key)
+            raise
+        finally:
+            self._entered -= 1
+
+    async def aget(self, provider):
+        token = _enter_resolving(self, provider, self._key)
+        try:
+            return await provider.aget(self._target_key)
+        finally:
+            _resolving.reset(token)
+
+    def _can_get_sync(self, provider, seen):
+        return _can_get_item_sync(provider, (self._target_key, ), seen)
+
+    def get_dependencies(self):
+        return [(self._target_key, True)]
 
 
 class CallerFrameServiceInfo(IServiceInfo):
-    'a `IServiceInfo` use for get caller frameinfo'
+    'a `IServiceInfo` use for get caller frameinfo, as a `FrameRecord`'
 
     __slots__ = ()
 
     def get(self, provider):
-        frs = inspect.getouterframes(inspect.currentframe())
-        for fr in frs[2:]:
-            mo = inspect.getmodule(fr.frame)
-            if mo is None or mo.__name__.partition('.')[0] != 'anyioc':
-                return fr
+        # skip this frame and the caller from `ServiceProvider`
+        return _get_caller_frame(2)
@@ -38,7 +38,7 @@ class Symbols:
     # the parent of current `IServiceProvider`
     provider_parent = _Symbol('provider_parent')
 
-    # the cache dict to store scoped instances
+    # a dict of current scope to cache anything by the user code, created on first use
     cache = _Symbol('cache')
 
     # the missing resolver from `IServiceProvider`
@@ -10,6 +10,7 @@ from inspect import signature, Parameter
 
 from ._utils import (
     get_module_name as _get_module_name,
+    make_injector as _make_injector,
     update_wrapper as _update_wrapper
 )
 
@@ -50,22 +51,9 @@ def injectable(*pos_args: List[Union[Tuple[Any], Tuple[Any, Any]]],
             raise ValueError('tuple should contains 1 or 2 elements')
 
     def decorator(func):
-        def new_func(ioc):
-            args = []
-            for item in pos_args:
-                if len(item) == 1:
-                    args.append(ioc[item[0]])
-                else:
-                    key, default = item
-                    args.append(ioc.get(key, default))
-            kwargs = {}
-            for name, item in kw_args.items():
-                if len(item) == 1:
-                    kwargs[name] = ioc[item[0]]
-                else:
-                    key, default = item
-                    kwargs[name] = ioc.get(key, default)
-            return func(*args, **kwargs)
+        new_func = _make_injector(func, pos_args, kw_args)
+        # the injection metadata, allow the provider to resolve the arguments by itself
+        new_func.__anyioc_injects__ = (func, pos_args, kw_args)
         return _update_wrapper(new_func, func)
 
     return decorator
@@ -216,6 +204,27 @@ def auto_enter(func):
         return item
     return new_func
 
+def blocking(func):
+    '''
+    mark the factory as blocking.
+
+    when resolve it by the async api of `AsyncServiceProvider`,
+    it will be called in the executor instead of the event loop.
+
+    ### Example:
+
+    ``` py
+    @blocking
+    def load_model(ioc):
+        return load_from_disk()
+
+    provider.register_singleton('model', load_model)
+    model = await provider.aget('model')
+    ```
+    '''
+    func.__anyioc_blocking__ = True
+    return func
+
 def make_group(container, group_key=None):
     '''
     add a new group into `container` by key `group_key`.
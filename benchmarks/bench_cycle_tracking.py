@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+# overhead benchmark for the circular dependency tracking.
+#
+# the resolving path is only tracked while a service is creating,
+# so the cached singletons and scoped services should not pay for it.
+# the others pay for a counter, the exact tracking by thread only runs
+# when the same service is creating already.
+# the baseline runs with the tracking patched out.
+#
+# usage: python -m benchmarks.bench_cycle_tracking [number]
+# ----------
+
+import sys
+from contextlib import contextmanager
+from timeit import repeat
+
+from anyioc import ServiceProvider
+from anyioc.ioc_service_info import BindedServiceInfo, ServiceInfo
+from anyioc.utils import inject_by_name
+
+
+def _untracked_create(self, provider):
+    service = self._factory(provider)
+    if self._auto_enter:
+        service = provider.enter(service)
+    return service
+
+def _untracked_bind_get(self, provider):
+    return provider[self._target_key]
+
+@contextmanager
+def tracking_disabled():
+    'replace the sync creation with the implementations without tracking.'
+    create, bind_get = ServiceInfo._create, BindedServiceInfo.get
+    ServiceInfo._create, BindedServiceInfo.get = _untracked_create, _untracked_bind_get
+    try:
+        yield
+    finally:
+        ServiceInfo._create, BindedServiceInfo.get = create, bind_get
+
+def run(number: int = 200_000):
+    provider = ServiceProvider()
+    provider.register_singleton('singleton', object)
+    provider.register_transient('transient', object)
+    # 4 binds to a transient, 9 creations for each get
+    provider.register_transient('deps', inject_by_name(lambda t1, t2, t3, t4: None))
+    for name in ('t1', 't2', 't3', 't4'):
+        provider.register_bind(name, 'transient')
+    provider['singleton']
+
+    def measure(key):
+        # the plans may hold the bound methods
+        provider._services.get_plans().clear()
+        return min(repeat(lambda: provider[key], number=number, repeat=5)) / number
+
+    results = []
+    for key in ('singleton', 'transient', 'deps'):
+        with tracking_disabled():
+            baseline = measure(key)
+        results.append((key, baseline, measure(key)))
+    return results
+
+def main(argv):
+    number = int(argv[1]) if len(argv) > 1 else 200_000
+    print(f'{"key":>10} {"off (ns)":>10} {"on (ns)":>10} {"overhead":>10}')
+    for key, baseline, elapsed in run(number):
+        print(f'{key:>10} {baseline * 1e9:>10.0f} {elapsed * 1e9:>10.0f} {elapsed / baseline - 1:>10.1%}')
+
+if __name__ == '__main__':
+    main(sys.argv)
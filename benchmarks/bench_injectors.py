@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+# benchmark for the generated injectors of `anyioc.utils.injectable()`,
+# against the injector which resolve the arguments by loop.
+#
+# usage: python -m benchmarks.bench_injectors [number]
+# ----------
+
+import sys
+from timeit import repeat
+
+from anyioc import ServiceProvider
+from anyioc.utils import injectable
+
+
+def loop_injectable(*pos_args, **kw_args):
+    'the previous implementation of `injectable()`.'
+    def decorator(func):
+        def new_func(ioc):
+            args = []
+            for item in pos_args:
+                if len(item) == 1:
+                    args.append(ioc[item[0]])
+                else:
+                    key, default = item
+                    args.append(ioc.get(key, default))
+            kwargs = {}
+            for name, item in kw_args.items():
+                if len(item) == 1:
+                    kwargs[name] = ioc[item[0]]
+                else:
+                    key, default = item
+                    kwargs[name] = ioc.get(key, default)
+            return func(*args, **kwargs)
+        return new_func
+    return decorator
+
+def _func(*args, **kwargs):
+    pass
+
+def run(number: int = 100_000):
+    provider = ServiceProvider()
+    for i in range(8):
+        provider.register_value(f'v{i}', i)
+
+    cases = {
+        'no args': ((), {}),
+        '2 pos': ([('v0', ), ('v1', )], {}),
+        '2 kw': ((), dict(a=('v0', ), b=('v1', ))),
+        '4 pos + 4 kw': (
+            [(f'v{i}', ) for i in range(4)],
+            {f'k{i}': (f'v{i + 4}', ) for i in range(4)}),
+        '4 pos + 4 default': (
+            [(f'v{i}', ) for i in range(4)],
+            {f'k{i}': (f'v{i + 4}', None) for i in range(4)}),
+    }
+
+    results = []
+    for name, (pos_args, kw_args) in cases.items():
+        timings = []
+        for decorator in (loop_injectable, injectable):
+            func = decorator(*pos_args, **kw_args)(_func)
+            timings.append(min(repeat(lambda: func(provider), number=number, repeat=5)) / number)
+        results.append((name, *timings))
+    return results
+
+def main(argv):
+    number = int(argv[1]) if len(argv) > 1 else 100_000
+    print(f'{"case":>20} {"loop (ns)":>10} {"generated (ns)":>15} {"speedup":>8}')
+    for name, loop, generated in run(number):
+        print(f'{name:>20} {loop * 1e9:>10.0f} {generated * 1e9:>15.0f} {loop / generated:>8.2f}')
+
+if __name__ == '__main__':
+    main(sys.argv)
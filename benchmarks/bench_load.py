@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+# load simulation for request scoped workloads.
+#
+# builds a synthetic service graph, then simulates the requests which
+# open a scope, resolve some services from it and exit it, driven by
+# a thread pool, a process pool and an asyncio event loop.
+#
+# in the asyncio mode, a part of the factories are async and await once,
+# so the concurrent requests overlap like the real world.
+#
+# reports the throughput, the latency percentiles and the peak memory per scope,
+# both for a single request and for the concurrent requests.
+# use it as the acceptance test for scaling work on the scopes.
+#
+# usage: python -m benchmarks.bench_load [--mode MODE] [--workers N] [--requests N] ...
+#        python -m benchmarks.bench_load --help
+# ----------
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, NamedTuple, Tuple
+
+from anyioc import AsyncServiceProvider, LifeTime, ServiceProvider
+from anyioc.utils import injectable
+
+MODES = ('threads', 'processes', 'asyncio')
+
+
+class Options(NamedTuple):
+    # the size of the service graph
+    services: int = 200
+    # the max dependencies of each service
+    max_deps: int = 4
+    # the range of services which resolved by each request
+    min_resolve: int = 20
+    max_resolve: int = 50
+    # the ratio of the async factories in the asyncio mode
+    async_ratio: float = 0.2
+    seed: int = 0
+
+
+class Service:
+    __slots__ = ('deps', )
+
+    def __init__(self, *deps):
+        self.deps = deps
+
+async def create_service_async(*deps):
+    # yield to the event loop, like a real io
+    await asyncio.sleep(0)
+    return Service(*deps)
+
+
+def build_provider(options: Options, provider_type=ServiceProvider) -> ServiceProvider:
+    '''
+    build a provider with a random service graph from `options.seed`.
+
+    a service only depends on the services which registered before it,
+    and singletons only depend on singletons.
+
+    for `AsyncServiceProvider`, a part of the services (`options.async_ratio`) use async factories,
+    the graph is the same for all provider types.
+    '''
+    use_async = issubclass(provider_type, AsyncServiceProvider)
+    # a separate random, so the ratio does not change the graph
+    async_rnd = random.Random(f'{options.seed}-async')
+    rnd = random.Random(options.seed)
+    provider = provider_type()
+    lifetimes = []
+    for i in range(options.services):
+        lifetime = rnd.choices(
+            (LifeTime.singleton, LifeTime.scoped, LifeTime.transient), (2, 4, 4))[0]
+        candidates = [j for j in range(i) if lifetime is not LifeTime.singleton or
+                      lifetimes[j] is LifeTime.singleton]
+        deps = rnd.sample(candidates, min(len(candidates), rnd.randint(0, options.max_deps)))
+        is_async = async_rnd.random() < options.async_ratio and use_async
+        factory = create_service_async if is_async else Service
+        provider.register(f's{i}', injectable(*[(f's{j}', ) for j in deps])(factory), lifetime)
+        lifetimes.append(lifetime)
+    return provider
+
+def build_requests(options: Options, count: int, offset: int = 0) -> List[List[str]]:
+    'returns the keys to resolve for each request.'
+    rnd = random.Random(options.seed + offset + 1)
+    return [
+        [f's{rnd.randrange(options.services)}'
+         for _ in range(rnd.randint(options.min_resolve, options.max_resolve))]
+        for _ in range(count)
+    ]
+
+def handle_request(provider: ServiceProvider, keys: List[str]) -> float:
+    'returns the latency of the request in seconds.'
+    start = time.perf_counter()
+    with provider.scope() as scoped:
+        for key in keys:
+            scoped[key]
+    return time.perf_counter() - start
+
+async def ahandle_request(provider: AsyncServiceProvider, keys: List[str]) -> float:
+    start = time.perf_counter()
+    async with provider.scope() as scoped:
+        for key in keys:
+            await scoped.aget(key)
+    return time.perf_counter() - start
+
+
+def run_threads(options: Options, workers: int, requests: int) -> List[float]:
+    provider = build_provider(options)
+    items = build_requests(options, requests)
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(lambda keys: handle_request(provider, keys), items))
+
+def _process_worker(options: Options, requests: int, offset: int) -> List[float]:
+    provider = build_provider(options)
+    return [handle_request(provider, keys) for keys in build_requests(options, requests, offset)]
+
+def run_processes(options: Options, workers: int, requests: int) -> List[float]:
+    chunks = [requests // workers + (1 if i < requests % workers else 0) for i in range(workers)]
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(_process_worker, options, n, i) for i, n in enumerate(chunks)]
+        return [latency for f in futures for latency in f.result()]
+
+async def arun_requests(provider: AsyncServiceProvider, items: List[List[str]], workers: int) -> List[float]:
+    'handle the requests with at most `workers` concurrent requests.'
+    semaphore = asyncio.Semaphore(workers)
+    async def handle(keys):
+        async with semaphore:
+            return await ahandle_request(provider, keys)
+    return await asyncio.gather(*[handle(keys) for keys in items])
+
+def run_asyncio(options: Options, workers: int, requests: int) -> List[float]:
+    provider = build_provider(options, AsyncServiceProvider)
+    items = build_requests(options, requests)
+    return asyncio.run(arun_requests(provider, items, workers))
+
+RUNNERS = {
+    'threads': run_threads,
+    'processes': run_processes,
+    'asyncio': run_asyncio,
+}
+
+
+def measure_scope_memory(options: Options, samples: int = 50) -> int:
+    '''
+    returns the peak traced memory in bytes of a single request scope.
+    '''
+    provider = build_provider(options)
+    items = build_requests(options, samples)
+    # create the singletons before measure
+    for keys in items:
+        handle_request(provider, keys)
+    peak = 0
+    tracemalloc.start()
+    try:
+        for keys in items:
+            tracemalloc.clear_traces()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            handle_request(provider, keys)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def measure_concurrent_scope_memory(options: Options, workers: int, samples: int = 200) -> Tuple[int, int]:
+    '''
+    returns the peak traced memory in bytes per scope and the max concurrent scopes,
+    when a batch of `workers` requests are running concurrently in the asyncio mode.
+    '''
+    provider = build_provider(options, AsyncServiceProvider)
+    items = build_requests(options, samples)
+    batches = [items[i:i + workers] for i in range(0, len(items), workers)]
+    running = max_running = 0
+
+    async def handle(keys):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        try:
+            return await ahandle_request(provider, keys)
+        finally:
+            running -= 1
+
+    async def main():
+        # create the singletons before measure
+        await arun_requests(provider, items, workers)
+        peak = 0
+        tracemalloc.start()
+        try:
+            for batch in batches:
+                tracemalloc.clear_traces()
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                await asyncio.gather(*[handle(keys) for keys in batch])
+                peak = max(peak, (tracemalloc.get_traced_memory()[1] - base) // len(batch))
+        finally:
+            tracemalloc.stop()
+        return peak
+
+    peak = asyncio.run(main())
+    return peak, max_running
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def run(mode: str, options: Options, workers: int, requests: int) -> dict:
+    start = time.perf_counter()
+    latencies = RUNNERS[mode](options, workers, requests)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return dict(
+        mode=mode,
+        workers=workers,
+        requests=requests,
+        elapsed=elapsed,
+        throughput=requests / elapsed,
+        latency=dict(
+            mean=statistics.fmean(latencies),
+            p50=percentile(latencies, 50),
+            p90=percentile(latencies, 90),
+            p99=percentile(latencies, 99),
+            max=latencies[-1],
+        ),
+    )
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='benchmarks.bench_load')
+    parser.add_argument('--mode', choices=MODES + ('all', ), default='all')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=10_000)
+    defaults = Options._field_defaults
+    parser.add_argument('--services', type=int, default=defaults['services'])
+    parser.add_argument('--max-deps', type=int, default=defaults['max_deps'])
+    parser.add_argument('--min-resolve', type=int, default=defaults['min_resolve'])
+    parser.add_argument('--max-resolve', type=int, default=defaults['max_resolve'])
+    parser.add_argument('--async-ratio', type=float, default=defaults['async_ratio'])
+    parser.add_argument('--seed', type=int, default=defaults['seed'])
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv[1:])
+
+    options = Options(args.services, args.max_deps, args.min_resolve, args.max_resolve,
+                      args.async_ratio, args.seed)
+    modes = MODES if args.mode == 'all' else (args.mode, )
+    concurrent_memory, concurrent_scopes = measure_concurrent_scope_memory(options, args.workers)
+    report = dict(
+        python=sys.version.split()[0],
+        options=options._asdict(),
+        scope_peak_memory=measure_scope_memory(options),
+        concurrent_scope_peak_memory=concurrent_memory,
+        concurrent_scopes=concurrent_scopes,
+        results=[run(mode, options, args.workers, args.requests) for mode in modes],
+    )
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f'python {report["python"]}, {options}')
+    print(f'peak memory per scope, sync: {report["scope_peak_memory"] / 1024:.1f} KiB')
+    print(f'peak memory per scope, asyncio with {report["concurrent_scopes"]} concurrent scopes: '
+          f'{report["concurrent_scope_peak_memory"] / 1024:.1f} KiB')
+    print(f'{"mode":>10} {"req/s":>10} {"p50 (ms)":>10} {"p90 (ms)":>10} {"p99 (ms)":>10} {"max (ms)":>10}')
+    for r in report['results']:
+        lat = r['latency']
+        print(f'{r["mode"]:>10} {r["throughput"]:>10.0f} {lat["p50"] * 1e3:>10.3f} '
+              f'{lat["p90"] * 1e3:>10.3f} {lat["p99"] * 1e3:>10.3f} {lat["max"] * 1e3:>10.3f}')
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+# microbenchmarks for the hot paths of the container.
+#
+# the results are written as JSON, so the runs from different commits can be compared:
+#
+#   python -m benchmarks.bench_micro -o before.json
+#   python -m benchmarks.bench_micro -o after.json --compare before.json
+#
+# usage: python -m benchmarks.bench_micro [-o output] [-k filter] [-r repeat] [--compare baseline]
+# ----------
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from timeit import Timer
+from typing import Callable, Dict
+
+from anyioc import ServiceProvider
+from anyioc.ioc_resolver import (
+    IServiceInfoResolver,
+    ImportServiceInfoResolver,
+    TypeNameServiceInfoResolver,
+    TypesServiceInfoResolver,
+)
+from anyioc.symbols import Symbols
+from anyioc.utils import get_logger, inject_by_anno, inject_by_keys, inject_by_name, injectable
+from anyioc.utils_conf import load_conf
+
+# name -> setup, the setup returns the callable to measure
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+def case(func):
+    CASES[func.__name__] = func
+    return func
+
+
+class _A:
+    pass
+
+class _B:
+    pass
+
+class _C:
+    def __init__(self, a: _A, b: _B):
+        self.a = a
+        self.b = b
+
+
+def _provider():
+    provider = ServiceProvider()
+    provider.register_singleton('singleton', object)
+    provider.register_scoped('scoped', object)
+    provider.register_transient('transient', object)
+    provider.register_value('value', 1)
+    provider.register_bind('bind', 'value')
+    provider.register_value('v1', 1)
+    provider.register_value('v2', 2)
+    provider.register_value('v3', 3)
+    provider.register_group('group', ['v1', 'v2', 'v3'])
+    for i in range(3):
+        provider.register_value('many', i)
+    provider['singleton'] # ensure init hooks called
+    return provider
+
+@case
+def get_singleton():
+    provider = _provider()
+    return lambda: provider['singleton']
+
+@case
+def get_scoped():
+    scoped = _provider().scope()
+    return lambda: scoped['scoped']
+
+@case
+def get_transient():
+    provider = _provider()
+    return lambda: provider['transient']
+
+@case
+def get_value():
+    provider = _provider()
+    return lambda: provider['value']
+
+@case
+def get_bind():
+    provider = _provider()
+    return lambda: provider['bind']
+
+@case
+def get_group():
+    provider = _provider()
+    return lambda: provider['group']
+
+@case
+def get_with_default():
+    provider = _provider()
+    return lambda: provider.get('value', None)
+
+@case
+def get_many():
+    provider = _provider()
+    return lambda: provider.get_many('many')
+
+@case
+def scope_create_exit():
+    provider = _provider()
+    def func():
+        with provider.scope():
+            pass
+    return func
+
+@case
+def scope_create_get_exit():
+    provider = _provider()
+    def func():
+        with provider.scope() as scoped:
+            scoped['singleton']
+            scoped['scoped']
+            scoped['transient']
+    return func
+
+@case
+def scope_nested_create_exit_depth_10():
+    provider = _provider()
+    def func():
+        scoped = provider
+        scopes = []
+        for _ in range(10):
+            scoped = scoped.scope()
+            scopes.append(scoped)
+        for scoped in reversed(scopes):
+            scoped.__exit__(None, None, None)
+    return func
+
+@case
+def scope_nested_get_depth_50():
+    provider = _provider()
+    scoped = provider
+    for i in range(50):
+        scoped = scoped.scope()
+        if i % 10 == 0:
+            scoped.register_value(f'layer-{i}', i)
+    return lambda: (scoped['singleton'], scoped['scoped'], scoped['value'])
+
+@case
+def miss_resolver_chain():
+    provider = _provider()
+    provider[Symbols.missing_resolver].append(TypesServiceInfoResolver())
+    provider[Symbols.missing_resolver].append(TypeNameServiceInfoResolver())
+    provider[Symbols.missing_resolver].append(IServiceInfoResolver())
+    return lambda: provider.get('unknown')
+
+@case
+def miss_import_resolver():
+    provider = _provider()
+    provider[Symbols.missing_resolver].append(ImportServiceInfoResolver())
+    return lambda: provider.get('unknown')
+
+@case
+def miss_import_resolver_lru_cache():
+    provider = _provider()
+    provider[Symbols.missing_resolver].append(ImportServiceInfoResolver().lru_cache())
+    return lambda: provider.get('unknown')
+
+@case
+def miss_without_resolver():
+    provider = _provider()
+    return lambda: provider.get('unknown')
+
+@case
+def injectable_factory():
+    provider = _provider()
+    provider.register_transient('c', injectable(('value', ), b=('v1', ), c=('unknown', 0))(
+        lambda a, b, c: None))
+    return lambda: provider['c']
+
+@case
+def inject_by_name_factory():
+    provider = _provider()
+    provider.register_transient('c', inject_by_name(lambda v1, v2, v3, missing=None: None))
+    return lambda: provider['c']
+
+@case
+def inject_by_anno_factory():
+    provider = _provider()
+    provider.register_singleton(_A, _A)
+    provider.register_singleton(_B, _B)
+    provider.register_transient(_C, inject_by_anno(_C))
+    return lambda: provider[_C]
+
+@case
+def inject_by_keys_factory():
+    provider = _provider()
+    provider.register_transient('c', inject_by_keys(a='v1', b='v2')(lambda a, b: None))
+    return lambda: provider['c']
+
+@case
+def get_logger_deep_stack():
+    provider = _provider()
+    provider.register_transient('logger', get_logger)
+    def func(depth=30):
+        if depth:
+            return func(depth - 1)
+        return provider['logger']
+    return func
+
+def _large_conf(size: int = 1000):
+    return {
+        'services': {
+            f'service-{i}': {
+                'factory': 'builtins:object',
+                'lifetime': ('transient', 'scoped', 'singleton')[i % 3],
+            } for i in range(size)
+        },
+        'values': {f'value-{i}': i for i in range(size)},
+        'groups': {f'group-{i}': [f'value-{i}', f'service-{i}'] for i in range(size)},
+        'binds': {f'bind-{i}': f'value-{i}' for i in range(size)},
+    }
+
+@case
+def load_conf_large():
+    conf = _large_conf()
+    return lambda: load_conf(ServiceProvider(), conf)
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict:
+    '''
+    measure the func and returns the stats of seconds per call.
+    '''
+    timer = Timer(func)
+    number, _ = timer.autorange()
+    samples = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return dict(
+        number=number,
+        min=min(samples),
+        median=statistics.median(samples),
+        max=max(samples),
+    )
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(filter: str = '', repeat: int = 5) -> dict:
+    results = {}
+    for name, setup in CASES.items():
+        if filter in name:
+            results[name] = measure(setup(), repeat)
+    return dict(
+        meta=dict(
+            commit=get_commit(),
+            python=sys.version.split()[0],
+            implementation=platform.python_implementation(),
+            platform=platform.platform(),
+            time=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        ),
+        results=results,
+    )
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='benchmarks.bench_micro')
+    parser.add_argument('-o', '--output', help='the JSON file to write, default to stdout')
+    parser.add_argument('-k', '--filter', default='', help='only run the cases which name contains it')
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('--compare', help='the JSON file from a previous run')
+    args = parser.parse_args(argv[1:])
+
+    report = run(args.filter, args.repeat)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fp:
+            fp.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)['results']
+        print(f'{"case":<36} {"base (ns)":>10} {"now (ns)":>10} {"change":>8}', file=sys.stderr)
+        for name, result in report['results'].items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            print(f'{name:<36} {base["min"] * 1e9:>10.0f} {result["min"] * 1e9:>10.0f} '
+                  f'{result["min"] / base["min"] - 1:>8.1%}', file=sys.stderr)
+
+if __name__ == '__main__':
+    main(sys.argv)
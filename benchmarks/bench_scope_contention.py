@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+# contention benchmark for open and close scopes on a shared root provider
+# from many threads, like a thread-pool web server does per request.
+#
+# on a free-threaded CPython build, the throughput should scale with threads.
+#
+# usage: python -m benchmarks.bench_scope_contention [threads] [cycles-per-thread]
+# ----------
+
+import sys
+import threading
+import time
+
+from anyioc import ServiceProvider
+
+
+def is_gil_enabled() -> bool:
+    func = getattr(sys, '_is_gil_enabled', None)
+    return True if func is None else func()
+
+def run(threads: int = 32, cycles: int = 20_000) -> float:
+    '''
+    run the benchmark and return the total scope cycles per second.
+    '''
+    provider = ServiceProvider()
+    provider.register_singleton('singleton', object)
+    provider.register_scoped('scoped', object)
+    provider['singleton'] # ensure init hooks called
+
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(cycles):
+            with provider.scope() as scoped:
+                scoped['singleton']
+                scoped['scoped']
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    assert not provider._scopes, 'exited scopes should be detached'
+    return threads * cycles / elapsed
+
+def main(argv):
+    threads = int(argv[1]) if len(argv) > 1 else 32
+    cycles = int(argv[2]) if len(argv) > 2 else 20_000
+    print(f'python {sys.version.split()[0]}, gil enabled: {is_gil_enabled()}')
+    baseline = run(1, cycles)
+    print(f'{"threads":>8} {"scopes/s":>12} {"scaling":>8}')
+    print(f'{1:>8} {baseline:>12.0f} {1:>8.2f}')
+    n = 2
+    while n <= threads:
+        rate = run(n, cycles)
+        print(f'{n:>8} {rate:>12.0f} {rate / baseline:>8.2f}')
+        n *= 2
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+# memory benchmark for open and close scopes on a long-lived root provider.
+#
+# the RSS should stay flat across cycles, since an exited scope
+# must not be retained by the root provider.
+#
+# usage: python -m benchmarks.bench_scope_memory [cycles]
+# ----------
+
+import gc
+import os
+import sys
+
+from anyioc import ServiceProvider
+
+
+def get_rss() -> int:
+    'get the current resident set size in bytes.'
+    try:
+        with open('/proc/self/statm') as fp:
+            return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        # peak RSS, in kilobytes on linux and bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+
+def run(cycles: int = 1_000_000, samples: int = 10):
+    provider = ServiceProvider()
+    provider.register_singleton('singleton', object)
+    provider.register_scoped('scoped', object)
+    provider.register_transient('transient', object)
+
+    step = max(cycles // samples, 1)
+    results = []
+    for i in range(cycles):
+        with provider.scope() as scoped:
+            scoped['singleton']
+            scoped['scoped']
+            scoped['transient']
+        if (i + 1) % step == 0:
+            gc.collect()
+            results.append((i + 1, get_rss()))
+
+    with provider:
+        pass
+    return results
+
+def main(argv):
+    cycles = int(argv[1]) if len(argv) > 1 else 1_000_000
+    results = run(cycles)
+    base = results[0][1]
+    print(f'{"cycles":>12} {"rss (MiB)":>12} {"delta (KiB)":>12}')
+    for count, rss in results:
+        print(f'{count:>12} {rss / 1024 / 1024:>12.2f} {(rss - base) / 1024:>12.0f}')
+
+if __name__ == '__main__':
+    main(sys.argv)
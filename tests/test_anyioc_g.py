@@ -7,6 +7,7 @@
 
 from pytest import raises
 
+from anyioc import g
 from anyioc.g import (
     ServiceProvider,
     get_module_provider, get_pkgroot_provider
@@ -35,6 +36,20 @@ def test_get_pkgroot_provider():
 
     assert isinstance(get_pkgroot_provider(), ServiceProvider)
 
+def test_get_provider_from_caller_cached():
+    def func():
+        return get_module_provider(), get_pkgroot_provider()
+
+    for _ in range(2):
+        assert func() == (get_module_provider(__name__), get_pkgroot_provider(__name__))
+    assert g._caller_module_providers[func.__code__] is get_module_provider(__name__)
+    assert g._caller_pkgroot_providers[func.__code__] is get_pkgroot_provider(__name__)
+
+def test_get_provider_from_unknown_module():
+    scope = dict(get_module_provider=get_module_provider)
+    exec('provider = get_module_provider()', scope)
+    assert scope['provider'] is get_module_provider('<stdin>')
+
 def test_scoped_provider_is_provider_root():
     provider = get_pkgroot_provider('a.b')
     assert provider[Symbols.provider_root] is provider
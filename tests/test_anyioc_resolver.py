@@ -5,14 +5,26 @@
 #
 # ----------
 
-from pytest import raises
+import abc
+import dataclasses
+import gc
+import sys
+import weakref
+from typing import Optional
+
+from pytest import mark, raises
 
 from anyioc import ServiceProvider, ServiceNotFoundError
 from anyioc.symbols import Symbols
 from anyioc.ioc_resolver import (
+    AutowireServiceInfoResolver,
+    IServiceInfoResolver,
     ImportServiceInfoResolver,
+    Inject,
+    TypeNameServiceInfoResolver,
     TypesServiceInfoResolver,
 )
+from anyioc.ioc_service_info import ValueServiceInfo
 from anyioc.utils import inject_by_name
 
 def test_import_resolver():
@@ -39,6 +51,128 @@ def test_import_resolver_with_cache():
     with raises(ServiceNotFoundError):
         _ = provider['unknown-some-wtf-module']
 
+def test_import_resolver_with_lru_cache():
+    provider = ServiceProvider()
+    resolver = ImportServiceInfoResolver().lru_cache(maxsize=2)
+    provider[Symbols.missing_resolver].append(resolver)
+    import sys
+    assert provider['sys'] is sys
+    assert provider['sys'] is sys
+    for _ in range(2):
+        with raises(ServiceNotFoundError):
+            _ = provider['unknown-some-wtf-module']
+    assert provider.get('unknown-some-wtf-module') is None
+    info = resolver.cache_info()
+    assert (info.hits, info.misses, info.maxsize, info.currsize) == (3, 2, 2, 2)
+
+def test_lru_cache_resolver():
+    class CountingResolver(IServiceInfoResolver):
+        def __init__(self):
+            self.calls = []
+
+        def get(self, provider, key):
+            self.calls.append(key)
+            if key == 'found':
+                return ValueServiceInfo(key)
+            return super().get(provider, key)
+
+    base = CountingResolver()
+    resolver = base.lru_cache(maxsize=2)
+    provider = ServiceProvider()
+    provider[Symbols.missing_resolver].append(resolver)
+
+    assert provider['found'] == 'found'
+    assert provider.get('a') is None
+    assert provider.get('a') is None
+    assert provider['found'] == 'found'
+    assert base.calls == ['found', 'a']
+
+    # evict the least recently used `a`
+    assert provider.get('b') is None
+    assert provider.get('a') is None
+    assert base.calls == ['found', 'a', 'b', 'a']
+    assert resolver.cache_info().currsize == 2
+
+    # the registrations drop the cached misses
+    provider.register_value('other', 1)
+    assert provider.get('a') is None
+    assert base.calls == ['found', 'a', 'b', 'a', 'a']
+    # but not the registrations of the scopes
+    with provider.scope() as scoped:
+        scoped.register_value('request', 2)
+        assert scoped.get('a') is None
+    assert base.calls == ['found', 'a', 'b', 'a', 'a']
+
+    resolver.cache_clear()
+    assert resolver.cache_info() == (0, 0, 2, 0)
+
+    with raises(ValueError):
+        base.lru_cache(maxsize=0)
+
+def test_resolver_protocol():
+    class GetResolver(IServiceInfoResolver):
+        def get(self, provider, key):
+            if key == 'get':
+                return ValueServiceInfo(key)
+            return super().get(provider, key)
+
+    class TryGetResolver(IServiceInfoResolver):
+        def try_get(self, provider, key):
+            if key == 'try_get':
+                return ValueServiceInfo(key)
+            return None
+
+    provider = ServiceProvider()
+    for resolver in (GetResolver(), TryGetResolver()):
+        assert resolver.try_get(provider, 'unknown') is None
+        with raises(ServiceNotFoundError):
+            resolver.get(provider, 'unknown')
+    assert GetResolver().try_get(provider, 'get').get(provider) == 'get'
+    assert TryGetResolver().get(provider, 'try_get').get(provider) == 'try_get'
+
+    provider[Symbols.missing_resolver].append(GetResolver() + TryGetResolver())
+    assert provider['get'] == 'get'
+    assert provider['try_get'] == 'try_get'
+    assert provider.get('unknown') is None
+
+def test_resolver_override_get_of_builtin_resolver():
+    class MyResolver(ImportServiceInfoResolver):
+        def get(self, provider, key):
+            if key == 'my':
+                return ValueServiceInfo(key)
+            return super().get(provider, key)
+
+    class MySubResolver(MyResolver):
+        def get(self, provider, key):
+            if key == 'sub':
+                return ValueServiceInfo(key)
+            return super().get(provider, key)
+
+    import json
+    for resolver in (MyResolver(), MySubResolver()):
+        provider = ServiceProvider()
+        provider[Symbols.missing_resolver].append(resolver)
+        assert provider['json'] is json
+        assert provider['my'] == 'my'
+        assert provider.get('unknown-some-wtf-module') is None
+        with raises(ServiceNotFoundError):
+            _ = provider['unknown-some-wtf-module']
+    assert provider['sub'] == 'sub'
+
+def test_duck_typing_missing_resolver():
+    class Resolver:
+        def get(self, provider, key):
+            if key == 'found':
+                return ValueServiceInfo(key)
+            raise ServiceNotFoundError(key)
+
+    provider = ServiceProvider()
+    provider.register_value(Symbols.missing_resolver, Resolver())
+    assert provider['found'] == 'found'
+    assert provider.get('unknown') is None
+    with raises(ServiceNotFoundError):
+        _ = provider['unknown']
+
 def test_type_resolver():
     class CLASS:
         def __init__(self, name):
@@ -84,3 +218,148 @@ def test_chain_resolver():
     assert provider[CLASS].name == 'some-name'
     with raises(ServiceNotFoundError):
         _ = provider['unknown-some-wtf-module']
+
+requires_annotated = mark.skipif(sys.version_info < (3, 9), reason='requires typing.Annotated')
+
+@requires_annotated
+def test_autowire_resolver():
+    from typing import Annotated
+
+    class Dep:
+        pass
+
+    class Other:
+        pass
+
+    class Service:
+        def __init__(self, dep: Dep, name, optional: Optional[int], keyed: Annotated[str, Inject('key')],
+                     skipped=1, *, kw: Dep, kw_default: Other = None):
+            self.args = (dep, name, optional, keyed, skipped, kw, kw_default)
+
+    provider = ServiceProvider()
+    provider.register_value('name', 'some-name')
+    provider.register_value('key', 'some-key')
+    provider.register_singleton(Dep, Dep)
+    provider[Symbols.missing_resolver].append(AutowireServiceInfoResolver())
+
+    service = provider[Service]
+    dep = provider[Dep]
+    assert service.args[:6] == (dep, 'some-name', None, 'some-key', 1, dep)
+    assert isinstance(service.args[6], Other)
+    assert provider[Service] is not service
+
+    # the plan is cached
+    resolver = provider[Symbols.missing_resolver].chain[-1]
+    assert resolver.get(provider, Service) is resolver.get(provider, Service)
+
+@requires_annotated
+def test_autowire_resolver_dataclass():
+    from typing import Annotated
+
+    @dataclasses.dataclass
+    class Data:
+        name: str
+        keyed: Annotated[int, Inject('key')]
+        value: int = 2
+        skipped: list = dataclasses.field(default_factory=list, init=False)
+
+    provider = ServiceProvider()
+    provider.register_value(str, 'some-name')
+    provider.register_value('key', 1)
+    provider[Symbols.missing_resolver].append(AutowireServiceInfoResolver())
+    assert provider[Data] == Data('some-name', 1, 2)
+
+def test_autowire_resolver_plan_cached_by_provider():
+    class Service:
+        def __init__(self, name):
+            self.name = name
+
+    class CountingResolver(AutowireServiceInfoResolver):
+        calls = 0
+        def try_get(self, provider, key):
+            self.calls += 1
+            return super().try_get(provider, key)
+
+    provider = ServiceProvider()
+    provider.register_value('name', 'a')
+    resolver = CountingResolver()
+    provider[Symbols.missing_resolver].append(resolver)
+
+    assert provider[Service].name == 'a'
+    with provider.scope() as scoped:
+        assert scoped[Service].name == 'a'
+    assert resolver.calls == 1
+
+    # resolve again after the root was changed
+    provider.register_value('name', 'b')
+    assert provider[Service].name == 'b'
+    assert resolver.calls == 2
+
+    # the registered one wins
+    with provider.register_value(Service, 'registered'):
+        assert provider[Service] == 'registered'
+    assert provider[Service].name == 'b'
+
+def test_autowire_resolver_ignores_abstract():
+    class Base(abc.ABC):
+        @abc.abstractmethod
+        def func(self):
+            pass
+
+    provider = ServiceProvider()
+    provider[Symbols.missing_resolver].append(AutowireServiceInfoResolver())
+    with raises(ServiceNotFoundError):
+        provider[Base]
+    with raises(ServiceNotFoundError):
+        provider[int]
+    with raises(ServiceNotFoundError):
+        provider['name']
+
+class _TypeNameBase:
+    pass
+
+class _TypeNameChild(_TypeNameBase):
+    class Nested:
+        pass
+
+def test_type_name_resolver():
+    provider = ServiceProvider()
+    resolver = TypeNameServiceInfoResolver()
+    resolver.inject_by = inject_by_name
+    provider[Symbols.missing_resolver].append(resolver)
+
+    assert isinstance(provider['_TypeNameBase'], _TypeNameBase)
+    # not a direct subclass of object
+    assert isinstance(provider['_TypeNameChild'], _TypeNameChild)
+    assert isinstance(provider['_TypeNameChild.Nested'], _TypeNameChild.Nested)
+    with raises(ServiceNotFoundError):
+        provider['_TypeNameUnknown']
+
+    # defined after the index was built
+    class _TypeNameLateDefined:
+        pass
+    assert isinstance(provider['_TypeNameLateDefined'], _TypeNameLateDefined)
+    LateCreated = type('_TypeNameLateCreated', (), {})
+    assert isinstance(provider['_TypeNameLateCreated'], LateCreated)
+
+    # created from other classes after the index was built
+    Dynamic = type('_TypeNameDynamic', (_TypeNameChild, ), {})
+    assert isinstance(provider['_TypeNameDynamic'], Dynamic)
+
+    # the misses are remembered until the root changed or invalidated
+    Unknown = type('_TypeNameUnknown', (_TypeNameChild, ), {})
+    with raises(ServiceNotFoundError):
+        provider['_TypeNameUnknown']
+    resolver.invalidate()
+    assert isinstance(provider['_TypeNameUnknown'], Unknown)
+    with raises(ServiceNotFoundError):
+        provider['_TypeNameMissing']
+    Missing = type('_TypeNameMissing', (), {})
+    provider.register_value('changed', True)
+    assert isinstance(provider['_TypeNameMissing'], Missing)
+
+    # the index does not keep the classes alive
+    ref = weakref.ref(Dynamic)
+    del Dynamic
+    gc.collect()
+    assert ref() is None
@@ -80,3 +80,36 @@ def test_servicesmap_with_context_release_twice_should_raise_error():
     with pytest.raises(RuntimeError):
         with disposable:
             pass
+
+def test_servicesmap_scope_lookup():
+    srvmap = ServicesMap()
+    item1 = object()
+    srvmap.add(1, item1)
+
+    scoped = srvmap
+    for _ in range(10):
+        scoped = scoped.scope()
+    assert scoped.get(1) is item1
+    assert scoped.get(2) is None
+
+    item2 = object()
+    srvmap.add(1, item2)
+    assert scoped.get(1) is item2
+
+def test_servicesmap_scope_add_after_child_created():
+    srvmap = ServicesMap()
+    item1 = object()
+    srvmap.add(1, item1)
+    scoped = srvmap.scope()
+    scoped_child = scoped.scope()
+    assert scoped_child.get(1) is item1
+
+    item2 = object()
+    with scoped.add(1, item2):
+        assert srvmap.get(1) is item1
+        assert scoped.get(1) is item2
+        assert scoped_child.get(1) is item2
+        assert list(scoped_child.get_many(1)) == [item2, item1]
+
+    assert scoped.get(1) is item1
+    assert scoped_child.get(1) is item1
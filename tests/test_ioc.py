@@ -5,8 +5,18 @@
 #
 # ----------
 
-from anyioc import ServiceProvider, IServiceProvider
+import gc
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from pytest import raises
+
+from anyioc import CircularDependencyError, LifeTime, ServiceNotFoundError, ServiceProvider, IServiceProvider
+from anyioc.ioc_service_info import ServiceInfo
 from anyioc.symbols import Symbols
+from anyioc.utils import Releaser, inject_by_name
 
 from tests.assert_utils import assert_value_singleton, assert_value_scoped, assert_value_transient
 
@@ -83,3 +93,295 @@ def test_types():
     provider = ServiceProvider()
     with provider.scope() as scope:
         assert isinstance(scope, ServiceProvider)
+
+def test_resolve_after_key_changed():
+    provider = ServiceProvider()
+    provider.register_value('k', 1)
+    assert provider['k'] == 1
+    disposable = provider.register_transient('k', lambda: 2)
+    assert provider['k'] == 2
+    disposable()
+    assert provider['k'] == 1
+
+def test_resolve_after_key_changed_in_scope():
+    provider = ServiceProvider()
+    provider.register_value('k', 1)
+    with provider.scope() as scoped:
+        assert scoped['k'] == 1
+        scoped.register_value('k', 2)
+        assert scoped['k'] == 2
+        assert provider['k'] == 1
+        provider.register_value('k', 3)
+        assert scoped['k'] == 2
+        assert provider['k'] == 3
+
+def test_resolve_after_key_changed_in_root():
+    provider = ServiceProvider()
+    with provider.scope() as scoped:
+        assert scoped.get('k') is None
+        provider.register_value('k', 1)
+        assert scoped['k'] == 1
+
+def test_scopes_share_plans_until_registered():
+    provider = ServiceProvider()
+    provider.register_transient('k', lambda: 1)
+    assert provider['k'] == 1
+    with provider.scope() as scoped, scoped.scope() as deep_scoped:
+        # compiled on the root, no recompile in the scopes
+        assert scoped._services.get_plans() is provider._services.get_plans()
+        assert scoped['k'] == 1
+        scoped.register_transient('k', lambda: 2)
+        assert scoped._services.get_plans() is not provider._services.get_plans()
+        assert deep_scoped._services.get_plans() is scoped._services.get_plans()
+        assert deep_scoped['k'] == scoped['k'] == 2
+        assert provider['k'] == 1
+
+def test_scope_from_subclass():
+    class MyServiceProvider(ServiceProvider):
+        def __init__(self, name):
+            super().__init__()
+            self.name = name
+
+    provider = MyServiceProvider('root')
+    provider.register_value('k', 1)
+    with provider.scope() as scoped:
+        assert isinstance(scoped, ServiceProvider)
+        assert scoped['k'] == 1
+
+def test_scope_detached_after_exit():
+    provider = ServiceProvider()
+    with provider.scope() as scoped:
+        scoped_ref = weakref.ref(scoped)
+    del scoped
+    gc.collect()
+    assert scoped_ref() is None
+
+def test_scope_exit_with_parent():
+    provider = ServiceProvider()
+    callback = MagicMock()
+    scoped = provider.scope()
+    scoped.scope().enter(Releaser(callback))
+    with provider:
+        pass
+    callback.assert_called_once()
+
+def test_scope_from_multi_threads():
+    provider = ServiceProvider()
+    provider.register_scoped('scoped', object)
+
+    def open_scopes(_):
+        for _ in range(100):
+            with provider.scope() as scoped:
+                assert scoped['scoped'] is scoped['scoped']
+
+    with ThreadPoolExecutor(16) as executor:
+        list(executor.map(open_scopes, range(32)))
+    assert not provider._scopes
+
+def test_scoped_create_concurrently_from_different_scopes():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def factory():
+        # deadlock if the scopes share the same lock
+        barrier.wait()
+        return object()
+
+    provider = ServiceProvider()
+    provider.register_scoped('scoped', factory)
+    scopes = [provider.scope(), provider.scope()]
+
+    with ThreadPoolExecutor(2) as executor:
+        left, right = executor.map(lambda scoped: scoped['scoped'], scopes)
+    assert left is not right
+    assert left is scopes[0]['scoped']
+    assert right is scopes[1]['scoped']
+
+def test_scoped_service_info_from_other_provider():
+    other = ServiceProvider()
+    provider = ServiceProvider()
+    provider.register_scoped('mine', lambda: 'mine')
+    provider.register_service_info('foreign', ServiceInfo(other, 'foreign', lambda: 'foreign', LifeTime.scoped))
+    with provider.scope() as scoped:
+        assert scoped['mine'] == 'mine'
+        assert scoped['foreign'] == 'foreign'
+
+def test_scoped_slots_reused_after_collected():
+    provider = ServiceProvider()
+    provider.register_scoped('a', object)
+    for _ in range(10):
+        with provider.scope() as scoped:
+            scoped.register_scoped('req', object)
+            assert scoped['req'] is scoped['req']
+    gc.collect()
+    with provider.scope() as scoped:
+        scoped.register_scoped('req', object)
+        scoped['a'], scoped['req']
+        assert len(scoped._scoped_instances) == 2
+    # a new root does not share the slots
+    other = ServiceProvider()
+    other.register_scoped('b', object)
+    other['b']
+    assert len(other._scoped_instances) == 1
+
+def test_scoped_slot_not_reused_while_cached():
+    provider = ServiceProvider()
+    disposable = provider.register_scoped('k', lambda: 1)
+    assert provider['k'] == 1
+    disposable()
+    gc.collect()
+    provider.register_scoped('k', lambda: 2)
+    assert provider['k'] == 2
+
+def test_scoped_none_value():
+    counter = 0
+    def factory():
+        nonlocal counter
+        counter += 1
+
+    provider = ServiceProvider()
+    provider.register_scoped('a', lambda: 1)
+    provider.register_scoped('none', factory)
+    with provider.scope() as scoped:
+        assert scoped['none'] is None
+        assert scoped['none'] is None
+        assert counter == 1
+        assert scoped['a'] == 1
+
+def test_current():
+    provider = ServiceProvider()
+    assert provider.current() is provider
+
+    with provider.scope() as scoped:
+        assert provider.current() is scoped
+        assert scoped.current() is scoped
+
+        with scoped.scope() as deep_scoped:
+            assert provider.current() is deep_scoped
+            assert scoped.current() is deep_scoped
+
+        with provider.scope() as other_scoped:
+            assert provider.current() is other_scoped
+            assert scoped.current() is scoped
+
+        assert provider.current() is scoped
+
+    assert provider.current() is provider
+
+def test_current_from_threads():
+    provider = ServiceProvider()
+    barrier = threading.Barrier(4, timeout=5)
+
+    def func(_):
+        with provider.scope() as scoped:
+            barrier.wait()
+            return provider.current() is scoped
+
+    with ThreadPoolExecutor(4) as executor:
+        assert all(executor.map(func, range(4)))
+    assert provider.current() is provider
+
+def test_current_exit_out_of_order():
+    provider = ServiceProvider()
+    scoped_1 = provider.scope().__enter__()
+    scoped_2 = provider.scope().__enter__()
+    scoped_1.__exit__(None, None, None)
+    assert provider.current() is scoped_2
+    scoped_2.__exit__(None, None, None)
+    assert provider.current() is provider
+
+def test_circular_dependency():
+    provider = ServiceProvider()
+    provider.register_singleton('a', inject_by_name(lambda b: None))
+    provider.register_transient('b', inject_by_name(lambda c: None))
+    provider.register_scoped('c', inject_by_name(lambda a: None))
+
+    for key, cycle in (('a', ('a', 'b', 'c', 'a')), ('b', ('b', 'c', 'a', 'b'))):
+        with raises(CircularDependencyError) as excinfo:
+            provider[key]
+        assert excinfo.value.cycle == cycle
+
+    # nothing was cached, and the path was cleaned
+    provider.register_transient('b', lambda: 'b')
+    assert provider['a'] is None
+
+def test_circular_dependency_bind_and_group():
+    provider = ServiceProvider()
+    provider.register_bind('a', 'b')
+    provider.register_bind('b', 'a')
+    provider.register_group('g', ['x', 'g'])
+    provider.register_value('x', 1)
+
+    with raises(CircularDependencyError) as excinfo:
+        provider['a']
+    assert excinfo.value.cycle == ('a', 'b', 'a')
+    with raises(CircularDependencyError) as excinfo:
+        provider['g']
+    assert excinfo.value.cycle == ('g', 'g')
+
+def test_same_key_from_parent_is_not_circular():
+    provider = ServiceProvider()
+    provider.register_transient('a', lambda: 1)
+    with provider.scope() as scoped:
+        scoped.register_transient('a', lambda ioc: ioc[Symbols.provider_parent]['a'] + 1)
+        assert scoped['a'] == 2
+
+def test_same_key_from_child_scope_is_not_circular():
+    for lifetime in (LifeTime.scoped, LifeTime.transient):
+        provider = ServiceProvider()
+        with provider.scope() as scoped:
+            def factory(ioc):
+                if ioc is scoped:
+                    with ioc.scope() as child:
+                        return child['y']
+                return 'child'
+            provider.register('y', factory, lifetime)
+            assert scoped['y'] == 'child'
+
+def test_circular_dependency_across_scopes():
+    provider = ServiceProvider()
+    with provider.scope() as scoped:
+        with scoped.scope() as child:
+            # scoped:y -> child:y -> scoped:y
+            def factory(ioc):
+                return (child if ioc is scoped else scoped)['y']
+            provider.register_transient('y', factory)
+            with raises(CircularDependencyError) as excinfo:
+                scoped['y']
+            assert excinfo.value.cycle == ('y', 'y', 'y')
+
+def test_same_key_from_threads_is_not_circular():
+    entered = threading.Event()
+    release = threading.Event()
+    def factory():
+        if not entered.is_set():
+            entered.set()
+            release.wait(5)
+        return 1
+
+    provider = ServiceProvider()
+    provider.register_transient('a', factory)
+    with ThreadPoolExecutor(1) as executor:
+        future = executor.submit(lambda: provider['a'])
+        assert entered.wait(5)
+        # the other thread is creating it
+        assert provider['a'] == 1
+        release.set()
+        assert future.result() == 1
+
+def test_get_not_found(monkeypatch):
+    provider = ServiceProvider()
+    provider.register_bind('bind', 'unknown')
+
+    with raises(ServiceNotFoundError, match="unknown service: 'unknown'$"):
+        _ = provider['unknown']
+    with raises(ServiceNotFoundError, match="resolve chain: 'bind'->'unknown'"):
+        provider.get('bind', None)
+
+    # probe the missing services without the errors
+    def init(*args):
+        raise AssertionError('should not create errors')
+    monkeypatch.setattr(ServiceNotFoundError, '__init__', init)
+    assert provider.get('unknown') is None
+    assert provider.get('unknown', 1) == 1
+    with provider.scope() as scoped:
+        assert scoped.get('unknown', 2) == 2
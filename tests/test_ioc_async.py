@@ -0,0 +1,523 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+#
+# ----------
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pytest import raises
+
+from anyioc import AsyncServiceProvider, CircularDependencyError, ServiceNotFoundError, ServiceProvider
+from anyioc.utils import blocking, inject_by_name
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_aget_async_factory():
+    async def factory():
+        await asyncio.sleep(0)
+        return object()
+
+    provider = AsyncServiceProvider()
+    provider.register_singleton('singleton', factory)
+    provider.register_scoped('scoped', factory)
+    provider.register_transient('transient', factory)
+
+    async def main():
+        singleton = await provider.aget('singleton')
+        assert not asyncio.iscoroutine(singleton)
+        assert singleton is await provider.aget('singleton')
+
+        async with provider.scope() as scoped_provider:
+            assert isinstance(scoped_provider, AsyncServiceProvider)
+            assert singleton is await scoped_provider.aget('singleton')
+            scoped = await scoped_provider.aget('scoped')
+            assert scoped is await scoped_provider.aget('scoped')
+            assert scoped is not await provider.aget('scoped')
+            assert await scoped_provider.aget('transient') is not await scoped_provider.aget('transient')
+
+    run(main())
+
+def test_aget_sync_factory():
+    provider = AsyncServiceProvider()
+    provider.register_value('value', 1)
+    provider.register_transient('transient', lambda ioc: ioc['value'] + 1)
+    provider.register_bind('bind', 'transient')
+    provider.register_group('group', ['value', 'bind'])
+
+    async def main():
+        assert await provider.aget('value') == 1
+        assert await provider.aget('transient') == 2
+        assert await provider.aget('bind') == 2
+        assert await provider.aget('group') == (1, 2)
+        assert await provider.aget(AsyncServiceProvider) is provider
+        assert await provider.aget(ServiceProvider) is provider
+
+    run(main())
+
+def test_aget_not_found():
+    provider = AsyncServiceProvider()
+    provider.register_bind('bind', 'unknown')
+
+    async def main():
+        with raises(ServiceNotFoundError):
+            await provider.aget('unknown')
+        assert await provider.aget('unknown', None) is None
+        with raises(ServiceNotFoundError, match="resolve chain: 'bind'->'unknown'"):
+            await provider.aget('bind', None)
+
+    run(main())
+
+def test_aget_many():
+    async def factory():
+        return 2
+
+    provider = AsyncServiceProvider()
+    provider.register_transient('a', lambda: 1)
+    provider.register_transient('a', factory)
+
+    async def main():
+        assert await provider.aget_many('a') == [2, 1]
+
+    run(main())
+
+def test_sync_api_unchanged():
+    provider = AsyncServiceProvider()
+    provider.register_singleton('a', lambda: 1)
+    assert provider['a'] == 1
+    with provider.scope() as scoped_provider:
+        assert scoped_provider['a'] == 1
+
+def test_auto_enter_async_context_manager():
+    class AsyncContextManager:
+        value = 0
+        async def __aenter__(self):
+            self.value = 1
+            return self
+
+        async def __aexit__(self, exc_type, exc_val, exc_tb):
+            self.value = 2
+
+    provider = AsyncServiceProvider(auto_enter=True)
+    provider.register_scoped('mgr', AsyncContextManager)
+
+    async def main():
+        async with provider.scope() as scoped_provider:
+            mgr = await scoped_provider.aget('mgr')
+            assert mgr.value == 1
+        assert mgr.value == 2
+
+    run(main())
+
+def test_exit_with_async_contexts():
+    exited = []
+
+    class AsyncContextManager:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc_val, exc_tb):
+            exited.append(self)
+
+    provider = AsyncServiceProvider(auto_enter=True)
+    provider.register_scoped('mgr', AsyncContextManager)
+
+    async def main():
+        scoped_provider = provider.scope()
+        mgr = await scoped_provider.aget('mgr')
+        with raises(RuntimeError, match='async with'):
+            with scoped_provider:
+                pass
+        assert exited == []
+        await scoped_provider.__aexit__(None, None, None)
+        assert exited == [mgr]
+
+    run(main())
+
+def test_aexit_alive_scopes():
+    events = []
+
+    class AsyncContextManager:
+        def __init__(self, name):
+            self.name = name
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc_val, exc_tb):
+            events.append(self.name)
+
+    provider = AsyncServiceProvider()
+
+    async def main():
+        async with provider:
+            await provider.aenter(AsyncContextManager('root'))
+            scoped_provider = provider.scope()
+            await scoped_provider.aenter(AsyncContextManager('scoped'))
+        assert events == ['scoped', 'root']
+        assert not provider._scopes
+
+    run(main())
+
+def test_aget_singleton_single_flight():
+    counter = 0
+
+    async def factory():
+        nonlocal counter
+        counter += 1
+        await asyncio.sleep(0.01)
+        return object()
+
+    provider = AsyncServiceProvider()
+    provider.register_singleton('singleton', factory)
+
+    async def main():
+        services = await asyncio.gather(*[provider.aget('singleton') for _ in range(50)])
+        assert counter == 1
+        assert all(s is services[0] for s in services)
+
+    run(main())
+
+def test_aget_scoped_single_flight():
+    counter = 0
+
+    async def factory():
+        nonlocal counter
+        counter += 1
+        await asyncio.sleep(0.01)
+        return object()
+
+    provider = AsyncServiceProvider()
+    provider.register_scoped('scoped', factory)
+
+    async def main():
+        async with provider.scope() as scoped_1, provider.scope() as scoped_2:
+            services_1 = await asyncio.gather(*[scoped_1.aget('scoped') for _ in range(10)])
+            services_2 = await asyncio.gather(*[scoped_2.aget('scoped') for _ in range(10)])
+        assert counter == 2
+        assert len(set(map(id, services_1))) == 1
+        assert len(set(map(id, services_2))) == 1
+        assert services_1[0] is not services_2[0]
+
+    run(main())
+
+def test_aget_singleton_single_flight_from_event_loops():
+    created = []
+    async def factory():
+        await asyncio.sleep(0.05)
+        created.append(object())
+        return created[-1]
+
+    provider = AsyncServiceProvider()
+    provider.register_singleton('s', factory)
+    barrier = threading.Barrier(2)
+
+    async def main():
+        barrier.wait(5)
+        return await provider.aget('s')
+
+    with ThreadPoolExecutor(2) as executor:
+        results = list(executor.map(lambda _: run(main()), range(2)))
+    assert len(created) == 1
+    assert results[0] is results[1] is created[0]
+
+def test_aget_singleton_single_flight_with_error():
+    counter = 0
+
+    class Exc(Exception):
+        pass
+
+    async def factory():
+        nonlocal counter
+        counter += 1
+        await asyncio.sleep(0.01)
+        if counter == 1:
+            raise Exc
+        return counter
+
+    provider = AsyncServiceProvider()
+    provider.register_singleton('singleton', factory)
+
+    async def main():
+        results = await asyncio.gather(*[provider.aget('singleton') for _ in range(10)], return_exceptions=True)
+        assert counter == 1
+        assert all(isinstance(r, Exc) for r in results)
+        # not cached
+        assert await provider.aget('singleton') == 2
+        assert await provider.aget('singleton') == 2
+
+    run(main())
+
+def test_aget_singleton_single_flight_with_cancelled():
+    counter = 0
+
+    async def factory():
+        nonlocal counter
+        counter += 1
+        await asyncio.sleep(0.01)
+        return counter
+
+    provider = AsyncServiceProvider()
+    provider.register_singleton('singleton', factory)
+
+    async def main():
+        first = asyncio.ensure_future(provider.aget('singleton'))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(provider.aget('singleton'))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 2
+        assert first.cancelled()
+
+    run(main())
+
+def test_aget_resolve_injected_dependencies_concurrently():
+    def slow_factory(value):
+        async def factory():
+            await asyncio.sleep(0.1)
+            return value
+        return factory
+
+    provider = AsyncServiceProvider()
+    provider.register_singleton('db', slow_factory('db'))
+    provider.register_singleton('cache', slow_factory('cache'))
+    provider.register_transient('conf', slow_factory('conf'))
+
+    @inject_by_name
+    async def create_service(db, cache, conf, name='default'):
+        return (db, cache, conf, name)
+
+    provider.register_scoped('service', create_service)
+    provider.register_group('group', ['db', 'cache', 'conf'])
+
+    async def main():
+        async with provider.scope() as scoped:
+            start = time.perf_counter()
+            assert await scoped.aget('service') == ('db', 'cache', 'conf', 'default')
+            assert time.perf_counter() - start < 0.25
+            start = time.perf_counter()
+            assert await scoped.aget('group') == ('db', 'cache', 'conf')
+            assert time.perf_counter() - start < 0.2
+
+    run(main())
+
+def test_aget_injected_dependencies_run_in_own_tasks():
+    async def task_factory():
+        task = asyncio.current_task()
+        await asyncio.sleep(0.01)
+        # never moved to other task after suspended
+        return task is asyncio.current_task()
+
+    provider = AsyncServiceProvider()
+    provider.register_transient('a', task_factory)
+    provider.register_transient('b', task_factory)
+    provider.register_singleton('c', lambda: 'c')
+    provider.register_transient('d', inject_by_name(lambda c: c + 'd'))
+
+    @inject_by_name
+    def create_service(a, b, c, d):
+        return (a, b, c, d)
+    provider.register_transient('service', create_service)
+
+    async def main():
+        assert await provider.aget('service') == (True, True, 'c', 'cd')
+
+    run(main())
+
+@pytest.mark.skipif(not hasattr(asyncio, 'timeout'), reason='requires asyncio.timeout()')
+def test_aget_injected_dependencies_with_timeout():
+    async def cfg():
+        try:
+            async with asyncio.timeout(0.02):
+                await asyncio.sleep(1)
+        except TimeoutError:
+            return 'cfg-fallback'
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return 'slow-ok'
+
+    provider = AsyncServiceProvider()
+    provider.register_transient('cfg', cfg)
+    provider.register_transient('slow', slow)
+    provider.register_transient('service', inject_by_name(lambda cfg, slow: [cfg, slow]))
+
+    async def main():
+        assert await provider.aget('service') == ['cfg-fallback', 'slow-ok']
+
+    run(main())
+
+def test_aget_injected_dependencies_not_found():
+    @inject_by_name
+    async def create_service(db):
+        return db
+
+    provider = AsyncServiceProvider()
+    provider.register_transient('service', create_service)
+
+    async def main():
+        with raises(ServiceNotFoundError, match="resolve chain: 'service'->'db'"):
+            await provider.aget('service')
+
+    run(main())
+
+def test_aget_injected_factory_wrapped_by_decorator():
+    def logged(func):
+        @functools.wraps(func)
+        def wrapper(ioc):
+            return ('wrapped', func(ioc))
+        return wrapper
+
+    @logged
+    @inject_by_name
+    def create_service(a):
+        return a
+
+    provider = AsyncServiceProvider()
+    provider.register_value('a', 1)
+    provider.register_transient('service', create_service)
+
+    async def main():
+        assert await provider.aget('service') == provider['service'] == ('wrapped', 1)
+
+    run(main())
+
+def test_current_from_tasks():
+    provider = AsyncServiceProvider()
+
+    async def func():
+        async with provider.scope() as scoped:
+            await asyncio.sleep(0.01)
+            return provider.current() is scoped
+
+    async def main():
+        assert all(await asyncio.gather(*[func() for _ in range(10)]))
+        assert provider.current() is provider
+
+    run(main())
+
+def test_aget_blocking_factory():
+    @blocking
+    def factory():
+        time.sleep(0.1)
+        return threading.get_ident()
+
+    provider = AsyncServiceProvider()
+    provider.register_singleton('blocking', factory)
+    provider.register_singleton('sync', lambda: threading.get_ident())
+
+    async def main():
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        ident = await provider.aget('blocking')
+        task.cancel()
+        assert ident != threading.get_ident()
+        assert ticks > 3 # the event loop was not blocked
+        assert await provider.aget('sync') == threading.get_ident()
+
+    run(main())
+
+def test_aget_blocking_singleton_with_sync_get_from_thread():
+    calls = []
+    @blocking
+    def factory():
+        calls.append(None)
+        time.sleep(0.1)
+        return object()
+
+    provider = AsyncServiceProvider()
+    provider.register_singleton('pool', factory)
+
+    async def main():
+        with ThreadPoolExecutor(1) as executor:
+            loop = asyncio.get_running_loop()
+            synced = loop.run_in_executor(executor, lambda: provider['pool'])
+            assert await provider.aget('pool') is await synced
+        assert len(calls) == 1
+
+    run(main())
+
+def test_aget_blocking_injected_factory():
+    @inject_by_name
+    @blocking
+    def factory(name):
+        return (name, threading.get_ident())
+
+    provider = AsyncServiceProvider()
+    provider.register_value('name', 'x')
+    provider.register_transient('blocking', factory)
+
+    async def main():
+        name, ident = await provider.aget('blocking')
+        assert name == 'x'
+        assert ident != threading.get_ident()
+
+    run(main())
+
+def test_aget_offload_sync_factories():
+    async def async_factory():
+        return threading.get_ident()
+
+    with ThreadPoolExecutor(1, thread_name_prefix='anyioc-test') as executor:
+        provider = AsyncServiceProvider(executor=executor, offload_sync_factories=True)
+        provider.register_transient('sync', lambda: threading.current_thread().name)
+        provider.register_transient('async', async_factory)
+        provider.register_transient('current', lambda ioc: ioc.current())
+
+        async def main():
+            assert (await provider.aget('sync')).startswith('anyioc-test')
+            assert await provider.aget('async') == threading.get_ident()
+            async with provider.scope() as scoped:
+                # the context is copied into the executor
+                assert await provider.aget('current') is scoped
+
+        run(main())
+
+def test_aget_circular_dependency():
+    async def a(b):
+        return b
+
+    async def b(a, c):
+        return a
+
+    provider = AsyncServiceProvider()
+    provider.register_singleton('a', inject_by_name(a))
+    provider.register_scoped('b', inject_by_name(b))
+    provider.register_value('c', 1)
+
+    async def main():
+        for key in ('a', 'b'):
+            with raises(CircularDependencyError):
+                # the single flight waiters must not hang
+                await asyncio.wait_for(provider.aget(key), 1)
+
+    run(main())
+
+def test_aget_same_key_from_child_scope_is_not_circular():
+    provider = AsyncServiceProvider()
+
+    async def main():
+        async with provider.scope() as scoped:
+            async def factory(ioc):
+                if ioc is scoped:
+                    async with ioc.scope() as child:
+                        return await child.aget('y')
+                return 'child'
+            provider.register_scoped('y', factory)
+            assert await scoped.aget('y') == 'child'
+
+    run(main())
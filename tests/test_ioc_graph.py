@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+#
+# ----------
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pytest import raises
+
+from anyioc import ServiceProvider, ServiceValidationError
+from anyioc.ioc_resolver import ImportServiceInfoResolver
+from anyioc.symbols import Symbols
+from anyioc.utils import inject_by_name, injectable
+
+
+def test_graph_nodes_and_edges():
+    provider = ServiceProvider()
+    provider.register_singleton('a', injectable(b=('b', ), c=('c', 1))(lambda b, c: (b, c)))
+    provider.register_transient('b', lambda: 'b')
+    provider.register_bind('c', 'b')
+    provider.register_group('g', ['a', 'b'])
+
+    graph = provider.get_dependency_graph()
+    assert 'a' in graph
+    assert set(graph.dependencies_of('a')) == {'b', 'c'}
+    assert graph.dependencies_of('c') == ['b']
+    assert graph.dependencies_of('g') == ['a', 'b']
+    assert set(graph.dependents_of('b')) == {'a', 'c', 'g'}
+    assert not graph.missing
+    assert graph['a'].dependencies[1].required is False
+
+def test_graph_does_not_create_services():
+    created = []
+
+    provider = ServiceProvider()
+    provider.register_singleton('a', injectable(b=('b', ))(lambda b: created.append('a')))
+    provider.register_transient('b', lambda: created.append('b'))
+
+    assert provider.validate() is not None
+    assert created == []
+
+def test_validate_missing():
+    @inject_by_name
+    def func(unknown, optional=None):
+        pass
+
+    provider = ServiceProvider()
+    provider.register_singleton('a', func)
+    provider.register_bind('b', 'unknown')
+
+    with raises(ServiceValidationError) as excinfo:
+        provider.validate()
+    issues = excinfo.value.issues
+    assert [i.kind for i in issues] == ['missing']
+    assert issues[0].keys == ('unknown', )
+    assert 'a' in issues[0].message and 'b' in issues[0].message
+    assert 'optional' not in provider.get_dependency_graph().missing
+
+def test_validate_cycle():
+    provider = ServiceProvider()
+    provider.register_singleton('a', injectable(b=('b', ))(lambda b: None))
+    provider.register_transient('b', injectable(c=('c', ))(lambda c: None))
+    provider.register_bind('c', 'a')
+
+    with raises(ServiceValidationError) as excinfo:
+        provider.validate()
+    issues = excinfo.value.issues
+    assert [i.kind for i in issues] == ['cycle']
+    assert set(issues[0].keys) == {'a', 'b', 'c'}
+
+def test_validate_lifetime():
+    provider = ServiceProvider()
+    provider.register_singleton('a', injectable(b=('b', ))(lambda b: None))
+    provider.register_transient('b', injectable(c=('c', ))(lambda c: None))
+    provider.register_scoped('c', lambda: None)
+    provider.register_singleton('d', injectable(c=('c', ))(lambda c: None))
+    provider.register_scoped('e', injectable(c=('c', ))(lambda c: None))
+
+    with raises(ServiceValidationError) as excinfo:
+        provider.validate()
+    issues = excinfo.value.issues
+    assert sorted(i.keys for i in issues) == [('a', 'b', 'c'), ('d', 'c')]
+    assert all(i.kind == 'lifetime' for i in issues)
+
+def test_graph_includes_dynamic_services():
+    provider = ServiceProvider()
+    provider.register_singleton('a', injectable(b=('b', ))(lambda b: None))
+    provider[Symbols.missing_resolver].append(ImportServiceInfoResolver())
+    provider.register_singleton('b', injectable(sys=('sys', ))(lambda sys: None))
+
+    graph = provider.validate()
+    assert graph['sys'].dynamic
+    assert not graph['b'].dynamic
+
+def test_warm_up():
+    lock = threading.Lock()
+    events = []
+
+    def factory(name, *deps):
+        @injectable(**{d: (d, ) for d in deps})
+        def create(**kwargs):
+            with lock:
+                events.append(name)
+            time.sleep(0.05)
+            return name
+        return create
+
+    provider = ServiceProvider()
+    provider.register_singleton('a', factory('a', 'b', 't'))
+    provider.register_singleton('b', factory('b'))
+    provider.register_singleton('c', factory('c'))
+    provider.register_transient('t', injectable(c=('c', ))(lambda c: c))
+    provider.register_singleton('d', factory('d'))
+    provider.register_value('v', 1)
+
+    start = time.perf_counter()
+    report = provider.warm_up(max_workers=4)
+    elapsed = time.perf_counter() - start
+
+    assert set(report) == {'a', 'b', 'c', 'd'}
+    assert all(isinstance(v, float) for v in report.values())
+    assert events.index('a') > events.index('b')
+    assert events.index('a') > events.index('c')
+    # b, c and d are created in parallel, then a
+    assert elapsed < 0.18
+
+    # created once
+    assert provider['a'] == 'a'
+    assert len(events) == 4
+    assert provider.warm_up() == {}
+
+def test_warm_up_concurrent_with_get():
+    counter = []
+
+    def factory():
+        counter.append(1)
+        time.sleep(0.05)
+        return object()
+
+    provider = ServiceProvider()
+    for i in range(8):
+        provider.register_singleton(i, factory)
+
+    with ThreadPoolExecutor(4) as executor:
+        gets = [executor.submit(provider.__getitem__, i) for i in range(8)]
+        provider.warm_up(max_workers=4)
+        values = [f.result() for f in gets]
+
+    assert len(counter) == 8
+    assert values == [provider[i] for i in range(8)]
+
+def test_warm_up_error():
+    def factory():
+        raise RuntimeError
+
+    provider = ServiceProvider()
+    provider.register_singleton('a', factory)
+    with raises(RuntimeError):
+        provider.warm_up()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2018~2999 - Cologler <skyoflw@gmail.com>
+# ----------
+#
+# ----------
+
+import asyncio
+import json
+
+from anyioc import AsyncServiceProvider, ServiceProvider
+
+
+def test_profiling_disabled_by_default():
+    provider = ServiceProvider()
+    provider.register_transient('transient', object)
+    provider['transient']
+    assert provider.disable_profiling() is None
+
+def test_profiling():
+    provider = ServiceProvider()
+    provider.register_singleton('singleton', object)
+    provider.register_scoped('scoped', object)
+    provider.register_transient('transient', object)
+    provider.register_value('value', 1)
+    # compiled before enabled
+    provider['singleton']
+
+    profiler = provider.enable_profiling()
+    assert provider.enable_profiling() is profiler
+
+    provider['singleton']
+    for _ in range(2):
+        with provider.scope() as scoped:
+            scoped['scoped']
+            scoped['scoped']
+            scoped['transient']
+    provider['value']
+
+    snapshot = profiler.snapshot()
+    assert snapshot['singleton']['count'] == 1
+    assert (snapshot['singleton']['hits'], snapshot['singleton']['misses']) == (1, 0)
+    assert snapshot['singleton']['construction']['count'] == 0
+    assert (snapshot['scoped']['hits'], snapshot['scoped']['misses']) == (2, 2)
+    assert snapshot['scoped']['construction']['count'] == 2
+    assert snapshot['scoped']['latency']['count'] == 4
+    assert snapshot['transient']['construction']['count'] == 2
+    assert (snapshot['transient']['hits'], snapshot['transient']['misses']) == (0, 0)
+    assert snapshot['value']['count'] == 1
+    assert snapshot['value']['construction']['count'] == 0
+    assert sum(snapshot['scoped']['latency']['buckets'].values()) == 4
+
+    assert json.loads(profiler.to_json())['scoped']['count'] == 4
+
+    assert provider.disable_profiling() is profiler
+    provider['singleton']
+    assert profiler.snapshot()['singleton']['count'] == 1
+
+    profiler.reset()
+    assert profiler.snapshot() == {}
+
+def test_profiling_from_scope():
+    provider = ServiceProvider()
+    provider.register_singleton('singleton', object)
+    with provider.scope() as scoped:
+        scoped['singleton']
+        profiler = scoped.enable_profiling()
+        scoped['singleton']
+        provider['singleton']
+    assert profiler.snapshot()['singleton']['count'] == 2
+
+def test_profiling_aget():
+    async def factory():
+        return object()
+
+    provider = AsyncServiceProvider()
+    provider.register_singleton('singleton', factory)
+    profiler = provider.enable_profiling()
+
+    async def main():
+        await provider.aget('singleton')
+        await provider.aget('singleton')
+
+    asyncio.run(main())
+    snapshot = profiler.snapshot()
+    assert (snapshot['singleton']['hits'], snapshot['singleton']['misses']) == (1, 1)
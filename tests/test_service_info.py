@@ -13,7 +13,10 @@ from anyioc.ioc_service_info import (
     GroupedServiceInfo,
     LifeTime,
     ProviderServiceInfo,
-    ServiceInfo
+    ScopedServiceInfo,
+    ServiceInfo,
+    SingletonServiceInfo,
+    TransientServiceInfo,
 )
 from anyioc.symbols import Symbols
 
@@ -37,6 +40,17 @@ def test_service_info():
     si = ServiceInfo(factory=lambda *, sr2fe: 15, **other_kwargs)
     assert si.get(other_kwargs['service_provider']) == 15
 
+@pytest.mark.parametrize('lifetime, service_info_type', [
+    (LifeTime.transient, TransientServiceInfo),
+    (LifeTime.scoped, ScopedServiceInfo),
+    (LifeTime.singleton, SingletonServiceInfo),
+])
+def test_service_info_types(lifetime, service_info_type):
+    si = ServiceInfo(ServiceProvider(), 'test-key', lambda: 15, lifetime)
+    assert type(si) is service_info_type
+    assert isinstance(si, ServiceInfo)
+    assert si._lifetime is lifetime
+
 @pytest.mark.parametrize('key', [
     Symbols.cache,
     Symbols.provider_options
@@ -25,6 +25,17 @@ def test_symbol_caller_frame_from_deep():
     provider.register_transient('name', get_name)
     assert provider['name'] == 'test_symbols'
 
+def test_symbol_caller_frame_record():
+    provider = ServiceProvider()
+    def get_frame():
+        return provider[Symbols.caller_frame]
+    fr = get_frame()
+    assert fr.function == 'get_frame'
+    assert fr.filename == __file__
+    assert fr.module_name == 'test_symbols'
+    assert fr.lineno == fr.frame.f_lineno
+    assert 'provider[Symbols.caller_frame]' in fr.code_context[0]
+
 def _create_scopes(provider: ServiceProvider, count: int=5):
     providers = [provider]
     for i in range(0, count):
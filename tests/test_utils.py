@@ -10,7 +10,7 @@ from pytest import raises
 
 from anyioc.ioc import ServiceProvider, ServiceNotFoundError
 from anyioc.utils import (
-    inject_by_name, inject_by_anno, inject_by_keys,
+    injectable, inject_by_name, inject_by_anno, inject_by_keys,
     make_group,
     get_logger,
     Releaser,
@@ -92,6 +92,29 @@ def test_inject_by_anno_without_anno_with_use_name_if_empty():
     instance = provider.get('some_class')
     assert instance.value == 'abc'
 
+def test_injectable():
+    def func(*args, **kwargs):
+        return args, kwargs
+
+    provider = ServiceProvider()
+    provider.register_value('a', 1)
+    provider.register_value('b', 2)
+    wrapped = injectable(('a', ), ('x', 3), b=('b', ), c=('y', 4), **{'class': ('a', ), 'd-e': ('b', )})(func)
+    provider.register_transient('func', wrapped)
+    assert provider['func'] == ((1, 3), {'b': 2, 'c': 4, 'class': 1, 'd-e': 2})
+    assert wrapped.__anyioc_injects__[0] is func
+
+    provider.register_transient('missing', injectable(('unknown', ))(func))
+    with raises(ServiceNotFoundError):
+        provider['missing']
+
+def test_injectable_get_logger():
+    provider = ServiceProvider()
+    provider.register_transient('logger', get_logger)
+    provider.register_transient('name', injectable(('logger', ))(lambda logger: logger.name))
+    # the injector is from anyioc
+    assert provider['name'] == 'test_utils'
+
 def test_inject_by_keys():
     class SomeClass:
         def __init__(self, first, second):
@@ -125,6 +148,13 @@ def test_helper_get_logger():
     assert logger.name == __name__
     assert logger.name == 'test_utils'
 
+def test_helper_get_logger_from_deep():
+    provider = ServiceProvider()
+    provider.register_transient('logger', get_logger)
+    provider.register_bind('logger-alias', 'logger')
+    with provider.scope() as scoped:
+        assert scoped['logger-alias'].name == 'test_utils'
+
 def test_helper_releaser():
     provider = ServiceProvider()
     callback = MagicMock()